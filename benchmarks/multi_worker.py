@@ -0,0 +1,125 @@
+"""
+Teste de carga da fila compartilhada entre vários workers
+
+Sobe N processos (na mesma máquina) consumindo o mesmo arquivo SQLite,
+com downloads simulados (sem rede). Dois workers falham de propósito:
+
+- um "cai" (os._exit) logo depois de retirar um job, sem concluí-lo;
+- outro "trava": para de renovar o lease do primeiro job até ele
+  expirar, percebe a perda (evento 'lease_lost') e então tenta concluir
+  o job com erro, como o QueueRunner faz ao interromper o download.
+  Essa conclusão atrasada tem de ser ignorada.
+
+Ao final confere que todos os jobs foram concluídos com sucesso
+exatamente uma vez, e que os dois jobs afetados voltaram para a fila e
+foram concluídos por outro worker.
+
+Uso:
+    python benchmarks/multi_worker.py --jobs 500 --workers 4 --lease 3
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+# Adiciona o diretório src ao path para imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from core.jobs import DownloadJob, PENDING, RUNNING, DONE, FAILED
+from core.job_store import SQLiteJobQueue
+
+
+def worker(db_path: str, worker_id: str, lease: float, mode: str) -> None:
+    queue = SQLiteJobQueue(db_path, worker_id=worker_id, lease_seconds=lease)
+    lost = []
+    queue.add_listener(lambda event, data: event == 'lease_lost' and lost.append(data['job_id']))
+    while True:
+        job = queue.get(timeout=lease * 3)
+        if job is None:
+            break
+        if mode == 'crash':
+            print(f"{worker_id}: caindo com o job {job.job_id} em andamento")
+            os._exit(1)
+        if mode == 'stall':
+            mode = 'normal'
+            print(f"{worker_id}: travado com o job {job.job_id} em andamento")
+            queue._heartbeat_stop.set()  # Simula um processo travado (sem heartbeat)
+            time.sleep(lease * 2.5)
+            queue.heartbeat()
+            if job.job_id in lost:
+                print(f"{worker_id}: perdeu o lease de {job.job_id}")
+            # O QueueRunner cancela o download e conclui com erro; deve ser ignorado
+            queue.complete(job.job_id, error="Download cancelado")
+            continue
+        time.sleep(random.uniform(0.001, 0.01))  # "Download" simulado
+        queue.complete(job.job_id)
+        # Conclusão repetida (ex.: nova tentativa após timeout) deve ser ignorada
+        queue.complete(job.job_id)
+    queue.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=4, help="Pelo menos 3")
+    parser.add_argument('--lease', type=float, default=3.0, help="Duração do lease, em segundos")
+    args = parser.parse_args()
+    if args.workers < 3:
+        parser.error("use pelo menos 3 workers (um cai, outro trava)")
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='yt4k-multi-'), 'queue.db')
+    queue = SQLiteJobQueue(db_path)
+    queue.put_many(
+        DownloadJob(url=f"https://www.youtube.com/watch?v={index:011d}",
+                    destination_folder='.', video_id=f"{index:011d}")
+        for index in range(args.jobs)
+    )
+
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=worker,
+                        args=(db_path, f"worker-{index}", args.lease,
+                              {0: 'crash', 1: 'stall'}.get(index, 'normal')))
+        for index in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    conn = sqlite3.connect(db_path)
+    done = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (DONE,)).fetchone()[0]
+    left = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)",
+                        (PENDING, RUNNING)).fetchone()[0]
+    failed = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (FAILED,)).fetchone()[0]
+    completions = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+    retried = conn.execute("SELECT job_id, worker_id FROM jobs WHERE attempts > 1").fetchall()
+    per_worker = conn.execute(
+        "SELECT worker_id, COUNT(*) FROM completions GROUP BY worker_id ORDER BY worker_id"
+    ).fetchall()
+    conn.close()
+    queue.close()
+
+    print(f"{args.jobs} jobs, {args.workers} workers, {elapsed:.1f}s")
+    for worker_id, count in per_worker:
+        print(f"  {worker_id}: {count} concluídos")
+    print(f"Concluídos: {done} | registros de conclusão: {completions} | "
+          f"falhas: {failed} | restantes: {left}")
+    print(f"Retomados: {', '.join(f'{j} ({w})' for j, w in retried) or 'nenhum'}")
+
+    # Sem a proteção do lease, a conclusão atrasada deixaria um job como falha
+    ok = (done == completions == args.jobs and failed == 0 and left == 0
+          and len(retried) == 2)
+    print("OK" if ok else "FALHOU")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
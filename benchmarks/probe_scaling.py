@@ -0,0 +1,113 @@
+"""
+Benchmark de escalabilidade da extração de informações (probe)
+
+Mede quantos probes por segundo o ExtractionPool atinge com 1, 2, 4...
+processos, comparando com o mesmo trabalho em threads (limitado pelo GIL).
+
+Sem --urls, usa uma carga sintética sem rede que reproduz a parte de CPU
+da extração: montar/interpretar um JSON de player grande e varrer o HTML
+com expressões regulares. Com --urls, faz a extração real pelo yt-dlp.
+
+Uso:
+    python benchmarks/probe_scaling.py
+    python benchmarks/probe_scaling.py --urls urls.txt --probes 40
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adiciona o diretório src ao path para imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from core.downloader import VideoDownloader
+from core.extraction import ExtractionPool, extract_compact_info
+
+
+def synthetic_probe(url: str) -> dict:
+    """Carga de CPU parecida com a de uma extração, sem acessar a rede"""
+    formats = [
+        {'itag': i, 'url': f"https://example.invalid/{url}/{i}?sig={'x' * 200}",
+         'mimeType': 'video/mp4; codecs="avc1.640028"', 'bitrate': i * 1000,
+         'height': (i % 8) * 270, 'signatureCipher': 's=' + 'ab' * 60}
+        for i in range(400)
+    ]
+    player_response = json.dumps({'streamingData': {'adaptiveFormats': formats},
+                                  'videoDetails': {'videoId': url, 'title': 'x' * 100}})
+    html = f'<script>var ytInitialPlayerResponse = {player_response};</script>' * 4
+
+    match = re.search(r'ytInitialPlayerResponse\s*=\s*({.+?});</script>', html)
+    data = json.loads(match.group(1))
+    adaptive = data['streamingData']['adaptiveFormats']
+    # Simula o decifrador de assinatura sobre cada formato
+    signatures = [''.join(reversed(fmt['signatureCipher']))[::2] for fmt in adaptive]
+    return {'id': data['videoDetails']['videoId'], 'formats': len(adaptive),
+            'signatures': len(signatures)}
+
+
+def real_thread_probe(url: str) -> dict:
+    return VideoDownloader().get_video_info(url)
+
+
+def run_processes(urls, workers: int, probe_fn) -> float:
+    pool = ExtractionPool(workers, probe_fn=probe_fn)
+    try:
+        pool.warm_up()
+        started = time.perf_counter()
+        pool.extract_many(urls)
+        return time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+
+def run_threads(urls, workers: int, probe_fn) -> float:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        list(executor.map(probe_fn, urls))
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--urls', help="Arquivo com uma URL por linha (extração real)")
+    parser.add_argument('--probes', type=int, default=200, help="Número de probes por rodada")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.urls:
+        with open(args.urls, 'r', encoding='utf-8') as f:
+            base = [line.strip() for line in f if line.strip()]
+        urls = [base[i % len(base)] for i in range(args.probes)]
+        process_fn, thread_fn = extract_compact_info, real_thread_probe
+    else:
+        urls = [f"video{i:06d}" for i in range(args.probes)]
+        process_fn, thread_fn = synthetic_probe, synthetic_probe
+
+    worker_counts = []
+    count = 1
+    while count <= args.max_workers:
+        worker_counts.append(count)
+        count *= 2
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+
+    print(f"CPUs: {os.cpu_count()} | probes por rodada: {len(urls)} | "
+          f"carga: {'real' if args.urls else 'sintética'}")
+    print(f"{'workers':>8} {'threads (p/s)':>15} {'processos (p/s)':>17} {'speedup':>9}")
+
+    baseline = None
+    for workers in worker_counts:
+        thread_time = run_threads(urls, workers, thread_fn)
+        process_time = run_processes(urls, workers, process_fn)
+        process_rate = len(urls) / process_time
+        baseline = baseline or process_rate
+        print(f"{workers:>8} {len(urls) / thread_time:>15.1f} {process_rate:>17.1f} "
+              f"{process_rate / baseline:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
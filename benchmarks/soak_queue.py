@@ -0,0 +1,165 @@
+"""
+Benchmark de estabilidade de memória (soak) da fila de downloads
+
+Importa um lote grande de URLs sintéticas, processa tudo com o
+QueueRunner real e acompanha o RSS do processo ao longo do tempo. Só a
+rede é simulada: cada job cria um YoutubeDL de verdade, com o extrator
+do YouTube (que forma um ciclo de referências com ele) segurando um info
+dict do tamanho pedido, como num download real. Com a fila em SQLite o
+RSS deve ficar plano; `--no-collect` desliga o gc.collect() do runner
+para comparar.
+
+Uso:
+    python benchmarks/soak_queue.py --jobs 5000 --backend sqlite
+    python benchmarks/soak_queue.py --jobs 5000 --backend memory
+    python benchmarks/soak_queue.py --jobs 5000 --no-collect
+"""
+import os
+import sys
+import time
+import types
+import random
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+# Adiciona o diretório src ao path para imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import yt_dlp
+
+from core.downloader import VideoDownloader
+from core.jobs import JobQueue, DownloadJob
+from core.job_store import SQLiteJobQueue
+from core import queue_runner
+from core.queue_runner import QueueRunner
+
+
+def current_rss_mb() -> float:
+    """RSS atual do processo em MB (Linux); cai para o pico via resource"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+class SimulatedDownloader(VideoDownloader):
+    """Monta o YoutubeDL do job normalmente, mas não acessa a rede"""
+
+    def __init__(self, info_kb: int, **kwargs):
+        super().__init__(**kwargs)
+        self.info_kb = info_kb
+
+    def download(self, url, destination_folder, download_format, audio_quality,
+                 video_quality, sections=None) -> None:
+        ydl_opts = self._build_ydl_options(destination_folder, download_format,
+                                           audio_quality, video_quality, sections)
+        ydl_opts['quiet'] = True
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # O extrator guarda o YoutubeDL e vice-versa: o info dict só é
+            # liberado quando o coletor desfaz o ciclo
+            extractor = ydl.get_info_extractor('Youtube')
+            extractor._soak_info = {
+                'id': url[-11:],
+                'formats': [{'url': 'x' * 1024, 'format_id': str(i)}
+                            for i in range(self.info_kb)],
+            }
+            for percent in (25, 50, 75, 100):
+                self._progress_hook({'status': 'downloading',
+                                     'downloaded_bytes': percent, 'total_bytes': 100})
+            self._progress_hook({'status': 'finished'})
+
+
+class SimulatedRunner(QueueRunner):
+    """QueueRunner real com o downloader simulado"""
+
+    def __init__(self, queue, max_workers: int, info_kb: int):
+        super().__init__(queue, max_workers)
+        self.info_kb = info_kb
+
+    def create_downloader(self, job: DownloadJob) -> VideoDownloader:
+        return SimulatedDownloader(self.info_kb, ydl_overrides=self.job_ydl_overrides(job))
+
+
+def synthetic_jobs(count: int, destination: str):
+    for index in range(count):
+        video_id = f"{index:011d}"
+        yield DownloadJob(
+            url=f"https://www.youtube.com/watch?v={video_id}",
+            destination_folder=destination,
+            video_id=video_id,
+            priority=random.randint(0, 3)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--backend', choices=('sqlite', 'memory'), default='sqlite')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--info-kb', type=int, default=256,
+                        help="Tamanho simulado do info dict por job, em KB")
+    parser.add_argument('--sample-every', type=float, default=2.0,
+                        help="Intervalo entre amostras de RSS, em segundos")
+    parser.add_argument('--no-collect', action='store_true',
+                        help="Desliga o gc.collect() feito pelo runner após cada job")
+    args = parser.parse_args()
+
+    if args.no_collect:
+        # Só o runner perde o gc.collect(); o coletor automático continua ativo
+        queue_runner.gc = types.SimpleNamespace(collect=lambda: 0)
+
+    workdir = tempfile.mkdtemp(prefix='yt4k-soak-')
+    if args.backend == 'sqlite':
+        queue = SQLiteJobQueue(os.path.join(workdir, 'queue.db'))
+    else:
+        queue = JobQueue()
+
+    rss_start = current_rss_mb()
+    started = time.perf_counter()
+    queue.put_many(synthetic_jobs(args.jobs, workdir))
+    enqueue_time = time.perf_counter() - started
+    print(f"Backend: {args.backend} | jobs: {args.jobs} | "
+          f"importação: {enqueue_time:.1f}s | RSS após importar: {current_rss_mb():.1f} MB")
+
+    done = threading.Event()
+    finished = [0]
+    lock = threading.Lock()
+
+    def on_event(event, data):
+        if event == 'finished':
+            with lock:
+                finished[0] += 1
+                if finished[0] >= args.jobs:
+                    done.set()
+
+    queue.add_listener(on_event)
+    runner = SimulatedRunner(queue, args.workers, args.info_kb)
+
+    print(f"{'tempo (s)':>10} {'concluídos':>12} {'jobs/s':>10} {'RSS (MB)':>10}")
+    samples = []
+    started = time.perf_counter()
+    runner.start()
+    while not done.wait(args.sample_every):
+        elapsed = time.perf_counter() - started
+        rss = current_rss_mb()
+        samples.append(rss)
+        print(f"{elapsed:>10.1f} {finished[0]:>12} {finished[0] / elapsed:>10.0f} {rss:>10.1f}")
+    runner.stop()
+
+    elapsed = time.perf_counter() - started
+    samples.append(current_rss_mb())
+    print(f"\nTotal: {args.jobs} jobs em {elapsed:.1f}s ({args.jobs / elapsed:.0f} jobs/s)")
+    print(f"RSS inicial: {rss_start:.1f} MB | mínimo: {min(samples):.1f} MB | "
+          f"máximo: {max(samples):.1f} MB | final: {samples[-1]:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
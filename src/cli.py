@@ -0,0 +1,447 @@
+"""
+YT 4K Downloader v2 - modo de linha de comando
+Operações sem interface gráfica (acompanhamento de canais, filas...)
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import ipaddress
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+
+# Adiciona o diretório src ao path para imports
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+from config.settings import ConfigManager, AppSettings, APP_CONFIG
+from core.archive import DownloadArchive
+from core.downloader import VideoDownloader, DownloadError, normalize_sections
+from core.jobs import (BaseJobQueue, JobQueue, DownloadJob, RUNNING,
+                       MIN_PRIORITY, MAX_PRIORITY)
+from core.job_store import SQLiteJobQueue
+from core.integrity import verify_folder
+from core.player_cache import PlayerCache
+from core.queue_runner import QueueRunner
+from core.watcher import ChannelWatcher, Subscription
+from services.api_server import ApiServer
+from services.queue_client import RemoteJobQueue
+
+
+def open_queue(args) -> BaseJobQueue:
+    """Fila de outra máquina com --server, persistida em SQLite com --store,
+    ou em memória"""
+    if getattr(args, 'server', None):
+        return RemoteJobQueue(args.server, args.token,
+                              worker_id=args.worker_id,
+                              lease_seconds=args.lease)
+    if args.store:
+        return SQLiteJobQueue(args.store,
+                              worker_id=getattr(args, 'worker_id', None),
+                              lease_seconds=getattr(args, 'lease', 60.0))
+    return JobQueue()
+
+
+def make_player_cache(config_manager: ConfigManager, warm_up: bool = True) -> Optional[PlayerCache]:
+    """Cache compartilhado do player, aquecido em segundo plano"""
+    if not config_manager.settings.engine.cache_enabled:
+        return None
+    cache = PlayerCache(str(config_manager.cache_dir))
+    cache.set_callbacks(status_callback=print)
+    if warm_up:
+        cache.warm_up_async()
+    return cache
+
+
+def make_runner(config_manager: ConfigManager, queue: BaseJobQueue) -> QueueRunner:
+    """Cria o executor da fila com as opções dos motores"""
+    engine = config_manager.settings.engine
+    ydl_overrides = engine.to_ydl_options()
+    player_cache = make_player_cache(config_manager)
+    if player_cache is not None:
+        ydl_overrides.update(player_cache.ydl_options())
+    return QueueRunner(queue, engine.max_concurrent_downloads,
+                       ydl_overrides,
+                       str(config_manager.archive_file),
+                       engine.checksum_algorithm)
+
+
+def make_job_factory(config_manager: ConfigManager):
+    """Cria jobs a partir do perfil escolhido em cada inscrição"""
+    settings = config_manager.settings
+    presets = settings.all_presets()
+
+    def factory(subscription: Subscription, entry: Dict[str, Any]) -> DownloadJob:
+        preset = presets.get(subscription.preset)
+        source = preset or settings
+        return DownloadJob(
+            url=entry['url'],
+            destination_folder=(subscription.destination_folder
+                                or settings.destination_folder
+                                or config_manager.get_downloads_folder()),
+            download_format=source.download_format,
+            audio_quality=source.audio_quality,
+            video_quality=source.video_quality,
+            video_id=entry['id'],
+            title=entry.get('title', ''),
+            source=subscription.url,
+            skip_archived=True
+        )
+
+    return factory
+
+
+def make_job_builder(config_manager: ConfigManager):
+    """Cria jobs a partir do JSON recebido pela API
+
+    A pasta de destino pedida precisa estar dentro da pasta de destino
+    configurada (caminhos relativos partem dela).
+    """
+    settings = config_manager.settings
+    validator = VideoDownloader()
+    root = Path(settings.destination_folder or config_manager.get_downloads_folder()).resolve()
+
+    def resolve_destination(folder: Any) -> str:
+        if not folder:
+            return str(root)
+        destination = (root / str(folder)).resolve()
+        if destination != root and root not in destination.parents:
+            raise ValueError(f"A pasta de destino deve ficar dentro de {root}")
+        return str(destination)
+
+    def choice(data: Dict[str, Any], name: str, default: str, options: str) -> str:
+        # Os valores vão direto para o seletor de formatos do yt-dlp
+        value = str(data.get(name, default))
+        if value not in APP_CONFIG[options]:
+            raise ValueError(f"'{name}' deve ser um destes: {', '.join(APP_CONFIG[options])}")
+        return value
+
+    def builder(data: Dict[str, Any]) -> DownloadJob:
+        url = str(data['url']).strip()
+        if not validator.validate_url(url):
+            raise DownloadError("URL inválida. Use apenas URLs do YouTube.")
+
+        source = settings
+        if data.get('preset'):
+            source = settings.all_presets().get(data['preset'])
+            if source is None:
+                raise ValueError(f"Perfil não encontrado: {data['preset']}")
+
+        sections = normalize_sections(data.get('sections'))
+        priority = data.get('priority', 0)
+        if isinstance(priority, bool) or not isinstance(priority, int) \
+                or not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+            raise ValueError("'priority' deve ser um número inteiro de 64 bits")
+
+        download_format = choice(data, 'download_format', source.download_format,
+                                 'supported_formats')
+        audio_quality = choice(data, 'audio_quality', source.audio_quality, 'audio_qualities')
+        video_quality = choice(data, 'video_quality', source.video_quality, 'video_qualities')
+
+        return DownloadJob(
+            url=url,
+            destination_folder=resolve_destination(data.get('destination_folder')),
+            download_format=download_format,
+            audio_quality=audio_quality,
+            video_quality=video_quality,
+            priority=priority,
+            video_id=validator.extract_video_id(url),
+            # Fim aberto fica como null: float('inf') não é JSON válido
+            sections=[[start, None if end == float('inf') else end]
+                      for start, end in sections],
+            source='api'
+        )
+
+    return builder
+
+
+def cmd_subscribe(args, config_manager: ConfigManager) -> int:
+    """Adiciona um canal/playlist às inscrições"""
+    settings = config_manager.settings
+    if args.preset and args.preset not in settings.all_presets():
+        print(f"Perfil não encontrado: {args.preset}")
+        return 1
+
+    subscription = Subscription(
+        url=args.url,
+        preset=args.preset or '',
+        destination_folder=args.destination or '',
+        interval_minutes=args.interval
+    )
+    if not args.backlog:
+        # Marca a listagem atual como vista: só o que sair depois é baixado
+        watcher = ChannelWatcher(JobQueue(), DownloadArchive(str(config_manager.archive_file)),
+                                 make_job_factory(config_manager),
+                                 seen=DownloadArchive(str(config_manager.seen_file)))
+        try:
+            print(f"{watcher.seed(subscription)} vídeo(s) existentes marcados como vistos.")
+        except Exception as e:
+            print(f"Erro ao listar {args.url}: {e}")
+            return 1
+
+    settings.subscriptions = [s for s in settings.subscriptions if s.get('url') != args.url]
+    settings.subscriptions.append(subscription.to_dict())
+    config_manager.save_settings()
+    config_manager.flush()
+    print(f"Inscrição salva: {args.url}")
+    return 0
+
+
+def cmd_watch(args, config_manager: ConfigManager) -> int:
+    """Acompanha as inscrições e baixa os vídeos novos até Ctrl+C"""
+    settings: AppSettings = config_manager.settings
+    if not settings.subscriptions:
+        print("Nenhuma inscrição cadastrada. Use o comando 'subscribe'.")
+        return 1
+
+    engine = settings.engine
+    queue = open_queue(args)
+    archive = DownloadArchive(str(config_manager.archive_file))
+
+    runner = make_runner(config_manager, queue)
+    runner.set_callbacks(status_callback=lambda job, msg: print(f"[{job.job_id}] {msg}"))
+
+    watcher = ChannelWatcher(queue, archive, make_job_factory(config_manager),
+                             engine.watch_concurrency, engine.watch_jitter,
+                             DownloadArchive(str(config_manager.seen_file)))
+    watcher.set_callbacks(status_callback=print)
+    for data in settings.subscriptions:
+        watcher.add_subscription(Subscription.from_dict(data))
+
+    runner.start()
+    watcher.start()
+    print(f"Acompanhando {len(settings.subscriptions)} inscrição(ões). Ctrl+C para sair.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Encerrando...")
+    finally:
+        watcher.stop()
+        runner.stop()
+    return 0
+
+
+def cmd_serve(args, config_manager: ConfigManager) -> int:
+    """Expõe a fila por HTTP até Ctrl+C"""
+    if not is_loopback(args.host) and not args.token:
+        print("Para ouvir na rede, defina um token com --token.")
+        return 1
+
+    queue = open_queue(args)
+    # Com --no-downloads a máquina só coordena; os downloads ficam com os workers
+    runner = None if args.no_downloads else make_runner(config_manager, queue)
+    server = ApiServer(queue, make_job_builder(config_manager),
+                       args.host, args.port, args.token)
+
+    if runner is not None:
+        runner.start()
+    print(f"API ouvindo em http://{args.host}:{args.port}. Ctrl+C para sair.")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Encerrando...")
+    finally:
+        if runner is not None:
+            runner.stop()
+    return 0
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def cmd_enqueue(args, config_manager: ConfigManager) -> int:
+    """Importa URLs (uma por linha) para a fila persistida"""
+    if not args.store:
+        print("Informe a fila com --store para importar URLs.")
+        return 1
+
+    queue = open_queue(args)
+    builder = make_job_builder(config_manager)
+    source = open(args.file, 'r', encoding='utf-8') if args.file != '-' else sys.stdin
+
+    def jobs() -> Iterator[DownloadJob]:
+        # Gera os jobs sob demanda para não carregar o arquivo inteiro
+        for line in source:
+            url = line.strip()
+            if not url or url.startswith('#'):
+                continue
+            try:
+                yield builder({'url': url, 'preset': args.preset})
+            except (ValueError, DownloadError) as e:
+                print(f"Ignorando {url}: {e}")
+
+    try:
+        added = queue.put_many(jobs())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"{added} job(s) adicionados. Pendentes: {queue.pending_count()}")
+    return 0
+
+
+def cmd_run(args, config_manager: ConfigManager) -> int:
+    """Processa a fila persistida até esvaziar (ou para sempre com --follow)"""
+    if not args.store and not getattr(args, 'server', None):
+        print("Informe a fila com --store.")
+        return 1
+
+    queue = open_queue(args)
+    runner = make_runner(config_manager, queue)
+
+    results = open(args.results, 'a', encoding='utf-8') if args.results else None
+
+    def on_event(event: str, data: Dict[str, Any]) -> None:
+        if event in ('finished', 'cancelled'):
+            print(f"[{data['job_id']}] {data['status']}")
+            if results is not None:
+                # Resultados saem em JSON Lines à medida que terminam
+                job = queue.get_job(data['job_id'])
+                results.write(json.dumps(job.to_dict(), ensure_ascii=False) + '\n')
+                results.flush()
+
+    queue.add_listener(on_event)
+    runner.start()
+    try:
+        while True:
+            time.sleep(1)
+            if not args.follow and queue.pending_count() == 0 \
+                    and not queue.list_jobs(RUNNING, limit=1):
+                break
+    except KeyboardInterrupt:
+        print("Encerrando...")
+    finally:
+        runner.stop()
+        if results is not None:
+            results.close()
+    return 0
+
+
+def cmd_worker(args, config_manager: ConfigManager) -> int:
+    """Worker sem interface que divide a fila com outros processos e máquinas
+
+    Na máquina da fila, vários workers podem apontar --store para o mesmo
+    arquivo (em disco local). Em outras máquinas, --server aponta para a
+    API de `serve` dessa máquina. Jobs de um worker que cair, travar ou
+    perder a rede voltam para a fila quando o lease expira.
+    """
+    if not args.store and not args.server:
+        print("Informe a fila compartilhada com --store ou --server.")
+        return 1
+
+    args.follow = True
+    print(f"Worker {args.worker_id or 'padrão'} aguardando jobs em {args.server or args.store}")
+    return cmd_run(args, config_manager)
+
+
+def cmd_verify(args, config_manager: ConfigManager) -> int:
+    """Confere os checksums registrados numa pasta"""
+    results = verify_folder(args.folder, full=args.full)
+    if not results:
+        print("Nenhum checksum registrado nesta pasta.")
+        return 1
+
+    problems = 0
+    for name, result in results:
+        if result in ('corrompido', 'ausente', 'sem suporte'):
+            problems += 1
+        if result != 'inalterado' or args.verbose:
+            print(f"{result:>11}  {name}")
+
+    print(f"{len(results)} arquivo(s) verificados, {problems} com problema.")
+    return 2 if problems else 0
+
+
+def cmd_cache(args, config_manager: ConfigManager) -> int:
+    """Gerencia o cache compartilhado do player"""
+    cache = make_player_cache(config_manager, warm_up=False)
+    if cache is None:
+        print("Cache desativado nas configurações.")
+        return 1
+
+    if args.clear:
+        cache.invalidate()
+        print(f"Cache removido: {cache.cache_dir}")
+    if args.warm:
+        cache.warm_up(force=True)
+    print(f"Cache: {cache.cache_dir} ({'aquecido' if cache.is_warm() else 'frio'})")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="YT 4K Downloader - linha de comando")
+    parser.add_argument('--config-dir', default='data', help="Pasta de configurações")
+    parser.add_argument('--store', help="Fila persistida em SQLite (ex.: data/queue.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    subscribe = commands.add_parser('subscribe', help="Acompanhar um canal ou playlist")
+    subscribe.add_argument('url')
+    subscribe.add_argument('--preset', help="Perfil usado nos downloads")
+    subscribe.add_argument('--destination', help="Pasta de destino")
+    subscribe.add_argument('--interval', type=float, default=60.0,
+                           help="Intervalo entre consultas, em minutos")
+    subscribe.add_argument('--backlog', action='store_true',
+                           help="Baixa também os vídeos já publicados")
+    subscribe.set_defaults(handler=cmd_subscribe)
+
+    watch = commands.add_parser('watch', help="Baixar automaticamente os vídeos novos")
+    watch.set_defaults(handler=cmd_watch)
+
+    serve = commands.add_parser('serve', help="API HTTP local para gerenciar a fila")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--token', help="Exige 'Authorization: Bearer <token>'")
+    serve.add_argument('--no-downloads', action='store_true',
+                       help="Só coordena a fila (os downloads ficam com os workers)")
+    serve.set_defaults(handler=cmd_serve)
+
+    enqueue = commands.add_parser('enqueue', help="Importar URLs para a fila persistida")
+    enqueue.add_argument('file', help="Arquivo com uma URL por linha ('-' para stdin)")
+    enqueue.add_argument('--preset', help="Perfil usado nos downloads")
+    enqueue.set_defaults(handler=cmd_enqueue)
+
+    run = commands.add_parser('run', help="Processar a fila persistida")
+    run.add_argument('--results', help="Grava os resultados em JSON Lines")
+    run.add_argument('--follow', action='store_true', help="Continua esperando novos jobs")
+    run.set_defaults(handler=cmd_run)
+
+    worker = commands.add_parser('worker', help="Consumir a fila junto com outros processos")
+    worker.add_argument('--worker-id', help="Identificação do worker (padrão: máquina:pid)")
+    worker.add_argument('--lease', type=float, default=60.0,
+                        help="Segundos até um job de um worker parado voltar para a fila")
+    worker.add_argument('--results', help="Grava os resultados em JSON Lines")
+    worker.add_argument('--server', help="API de `serve` de outra máquina (ex.: http://fila:8765)")
+    worker.add_argument('--token', help="Token da API de --server")
+    worker.set_defaults(handler=cmd_worker)
+
+    verify = commands.add_parser('verify', help="Conferir os checksums de uma pasta")
+    verify.add_argument('folder')
+    verify.add_argument('--full', action='store_true',
+                        help="Recalcula todos, inclusive os inalterados")
+    verify.add_argument('--verbose', action='store_true', help="Lista também os inalterados")
+    verify.set_defaults(handler=cmd_verify)
+
+    cache = commands.add_parser('cache', help="Cache compartilhado do player do YouTube")
+    cache.add_argument('--clear', action='store_true', help="Descarta o cache atual")
+    cache.add_argument('--warm', action='store_true', help="Aquece o cache agora")
+    cache.set_defaults(handler=cmd_cache)
+
+    return parser
+
+
+def main() -> None:
+    """Função principal do modo de linha de comando"""
+    args = build_parser().parse_args()
+    config_manager = ConfigManager(args.config_dir)
+    sys.exit(args.handler(args, config_manager))
+
+
+if __name__ == '__main__':
+    main()
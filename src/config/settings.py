@@ -1,63 +1,440 @@
 import os
 import json
-from typing import Dict, Any, Tuple
+import atexit
+import tempfile
+import threading
+from dataclasses import dataclass, field, asdict, fields, MISSING
+from datetime import datetime
+from typing import Dict, Any, Optional, List
 from pathlib import Path
 
+from core.file_lock import file_lock
+from core.integrity import check_algorithm
+
+
+@dataclass
+class DownloadPreset:
+    """Perfil nomeado com as opções de download"""
+    name: str
+    download_format: str = 'mp3'
+    audio_quality: str = '192 kbps'
+    video_quality: str = '1080'
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any],
+                  problems: Optional[List[str]] = None) -> 'DownloadPreset':
+        return cls(**_known_fields(cls, data, problems))
+
+
+@dataclass
+class EngineSettings:
+    """Opções dos motores de download (concorrência, taxa e cache)"""
+    max_concurrent_downloads: int = 2
+    concurrent_fragments: int = 4
+    rate_limit: str = ''        # Ex.: '5M', '500K'. Vazio = sem limite
+    cache_enabled: bool = True
+    cache_dir: str = ''         # Vazio = data/cache
+    watch_concurrency: int = 4  # Consultas simultâneas do modo de acompanhamento
+    extraction_processes: int = 2  # Processos para obter informações (0 = desativado)
+    checksum_algorithm: str = 'sha256'  # Ex.: 'sha256', 'xxh3_128'. Vazio = desativado
+    watch_jitter: float = 0.2   # Variação aleatória do intervalo entre consultas
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any],
+                  problems: Optional[List[str]] = None) -> 'EngineSettings':
+        return cls(**_known_fields(cls, data, problems))
+
+    def to_ydl_options(self) -> Dict[str, Any]:
+        """Converte as opções para o formato do yt-dlp"""
+        options: Dict[str, Any] = {
+            'concurrent_fragment_downloads': max(1, int(self.concurrent_fragments)),
+        }
+        rate = _parse_rate(self.rate_limit)
+        if rate:
+            options['ratelimit'] = rate
+        if not self.cache_enabled:
+            options['cachedir'] = False
+        return options
+
+
+@dataclass
+class AppSettings:
+    """Modelo tipado das configurações persistidas"""
+    destination_folder: str = ''
+    download_format: str = 'mp3'
+    audio_quality: str = '192 kbps'
+    video_quality: str = '1080'
+    active_preset: str = ''
+    presets: Dict[str, DownloadPreset] = field(default_factory=dict)
+    engine: EngineSettings = field(default_factory=EngineSettings)
+    subscriptions: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any],
+                  problems: Optional[List[str]] = None) -> 'AppSettings':
+        """Cria as configurações a partir do JSON, ignorando chaves desconhecidas
+
+        Valores do tipo errado são convertidos quando possível (ex.: "4" em
+        4); os demais voltam ao padrão e são descritos em `problems`.
+        """
+        values = _known_fields(cls, data, problems)
+        presets = data.get('presets')
+        values['presets'] = {
+            name: DownloadPreset.from_dict({**preset, 'name': name}, problems)
+            for name, preset in (presets.items() if isinstance(presets, dict) else ())
+            if isinstance(preset, dict)
+        }
+        engine = data.get('engine')
+        values['engine'] = EngineSettings.from_dict(
+            engine if isinstance(engine, dict) else {}, problems
+        )
+        subscriptions = values.get('subscriptions', [])
+        if not isinstance(subscriptions, list):
+            _report(problems, 'subscriptions', subscriptions)
+            subscriptions = []
+        values['subscriptions'] = [s for s in subscriptions if isinstance(s, dict)]
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for preset in data['presets'].values():
+            preset.pop('name', None)
+        return data
+
+    def all_presets(self) -> Dict[str, DownloadPreset]:
+        """Retorna os perfis padrão mesclados com os do usuário"""
+        merged = {name: DownloadPreset(**asdict(preset))
+                  for name, preset in DEFAULT_PRESETS.items()}
+        merged.update(self.presets)
+        return merged
+
+    def apply_preset(self, name: str) -> None:
+        """Aplica um perfil às opções de download atuais"""
+        preset = self.all_presets().get(name)
+        if preset is None:
+            raise KeyError(f"Perfil não encontrado: {name}")
+        self.download_format = preset.download_format
+        self.audio_quality = preset.audio_quality
+        self.video_quality = preset.video_quality
+        self.active_preset = name
+
+
+def _known_fields(cls, data: Dict[str, Any],
+                  problems: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Filtra os campos conhecidos da dataclass, convertendo os escalares
+
+    Um valor que não pode ser convertido para o tipo do campo fica de fora
+    (a dataclass usa o padrão) e é descrito em `problems`.
+    """
+    values = {}
+    for f in fields(cls):
+        if f.name in ('presets', 'engine') or f.name not in data:
+            continue
+        value = data[f.name]
+        if f.type in _SCALAR_TYPES:
+            try:
+                value = _coerce(value, f.type)
+            except (TypeError, ValueError):
+                if f.default is MISSING:
+                    raise
+                _report(problems, f.name, value)
+                continue
+        values[f.name] = value
+    return values
+
+
+_SCALAR_TYPES = (str, int, float, bool)
+_BOOL_STRINGS = {'true': True, '1': True, 'yes': True, 'sim': True,
+                 'false': False, '0': False, 'no': False, 'não': False, '': False}
+
+
+def _coerce(value: Any, kind: type) -> Any:
+    """Converte `value` para `kind` ou levanta ValueError/TypeError"""
+    if value is None:
+        raise TypeError("valor nulo")
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        if isinstance(value, str) and value.strip().lower() in _BOOL_STRINGS:
+            return _BOOL_STRINGS[value.strip().lower()]
+        raise ValueError(value)
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError(value)
+    if kind is str:
+        return str(value)
+    if kind is int:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(value)
+        return int(number)
+    return float(value)
+
+
+def _report(problems: Optional[List[str]], name: str, value: Any) -> None:
+    if problems is not None:
+        problems.append(f"Valor inválido para '{name}' ({value!r}); usando o padrão")
+
+
+def _merge_changes(disk: Dict[str, Any], base: Dict[str, Any],
+                   current: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplica sobre `disk` só o que mudou de `base` para `current`
+
+    `presets` e `engine` são comparados chave a chave, para que dois
+    processos possam alterar perfis ou opções diferentes.
+    """
+    merged = dict(disk)
+    for key, value in current.items():
+        old = base.get(key)
+        if value == old:
+            continue
+        if key in ('presets', 'engine') and isinstance(old, dict):
+            section = merged.get(key)
+            section = dict(section) if isinstance(section, dict) else {}
+            for name in set(value) | set(old):
+                if name not in value:
+                    section.pop(name, None)
+                elif value[name] != old.get(name):
+                    section[name] = value[name]
+            merged[key] = section
+        else:
+            merged[key] = value
+    return merged
+
+
+def _parse_rate(rate: str) -> Optional[int]:
+    """Converte '5M', '500K' ou '1048576' em bytes por segundo"""
+    rate = (rate or '').strip().upper().rstrip('B')
+    if not rate:
+        return None
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    try:
+        if rate[-1] in multipliers:
+            return int(float(rate[:-1]) * multipliers[rate[-1]])
+        return int(float(rate))
+    except ValueError:
+        return None
+
+
 class ConfigManager:
-    """Gerenciador de configurações da aplicação"""
-    
-    def __init__(self, config_dir: str = 'data'):
+    """Gerenciador de configurações da aplicação
+
+    As gravações são agrupadas (debounce) e feitas de forma atômica:
+    o JSON é escrito num arquivo temporário e depois renomeado sobre
+    o config.json, de modo que uma falha nunca deixa o arquivo corrompido.
+
+    Vários processos (interface, `subscribe`, `watch`) usam o mesmo
+    arquivo. Cada gravação relê o disco sob uma trava de arquivo e aplica
+    só os campos que este processo alterou desde a última leitura, então
+    uma alteração feita por outro processo não é sobrescrita.
+    """
+
+    def __init__(self, config_dir: str = 'data', save_delay: float = 1.0):
         self.config_dir = Path(config_dir)
         self.config_file = self.config_dir / 'config.json'
+        self.lock_file = self.config_dir / '.config.lock'
+        self.save_delay = save_delay
+        self._settings: Optional[AppSettings] = None
+        self._base: Dict[str, Any] = {}  # Estado lido/gravado por último
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.warnings: List[str] = []  # Problemas encontrados ao carregar
         self._ensure_config_dir()
-    
+        atexit.register(self.flush)
+
     def _ensure_config_dir(self) -> None:
         """Garante que o diretório de configuração existe"""
-        self.config_dir.mkdir(exist_ok=True)
-    
-    def save_config(self, destination_folder: str, download_format: str, 
-                   audio_quality: str, video_quality: str = '1080') -> None:
-        """Salva as configurações no arquivo JSON"""
-        config_data = {
-            'destination_folder': destination_folder,
-            'download_format': download_format,
-            'audio_quality': audio_quality,
-            'video_quality': video_quality,
-            'last_updated': str(Path().cwd())
-        }
-        
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def settings(self) -> AppSettings:
+        """Configurações atuais (carregadas sob demanda)"""
+        with self._lock:
+            if self._settings is None:
+                self._settings = self._read_settings()
+            return self._settings
+
+    def load_settings(self) -> AppSettings:
+        """Recarrega as configurações do disco"""
+        with self._lock:
+            self._settings = self._read_settings()
+            return self._settings
+
+    def update(self, **changes: Any) -> AppSettings:
+        """Altera campos das configurações e agenda a gravação"""
+        with self._lock:
+            settings = self.settings
+            for key, value in changes.items():
+                if not hasattr(settings, key):
+                    raise AttributeError(f"Configuração desconhecida: {key}")
+                setattr(settings, key, value)
+            self.save_settings()
+            return settings
+
+    def save_settings(self) -> None:
+        """Agenda a gravação; chamadas próximas são agrupadas numa só escrita"""
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Grava imediatamente as alterações pendentes"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty or self._settings is None:
+                return
+            current = self._settings.to_dict()
+            try:
+                with file_lock(self.lock_file):
+                    try:
+                        disk = self._read_raw()
+                    except ValueError as e:
+                        # Arquivo corrompido: regrava a partir do estado deste processo
+                        print(f"Erro ao carregar configuração: {e}")
+                        disk = self._base
+                    data = _merge_changes(disk, self._base, current)
+                    data['last_updated'] = datetime.now().isoformat(timespec='seconds')
+                    self._write_atomic(data)
+                self._dirty = False
+            except Exception as e:
+                print(f"Erro ao salvar configuração: {e}")
+                return
+            # Incorpora o que outros processos gravaram
+            merged = AppSettings.from_dict(data)
+            self._check_engine(merged.engine, [])
+            for f in fields(AppSettings):
+                setattr(self._settings, f.name, getattr(merged, f.name))
+            self._base = self._settings.to_dict()
+
+    def save_preset(self, name: str) -> DownloadPreset:
+        """Salva as opções de download atuais como um perfil nomeado"""
+        with self._lock:
+            settings = self.settings
+            preset = DownloadPreset(
+                name=name,
+                download_format=settings.download_format,
+                audio_quality=settings.audio_quality,
+                video_quality=settings.video_quality
+            )
+            settings.presets[name] = preset
+            settings.active_preset = name
+            self.save_settings()
+            return preset
+
+    def delete_preset(self, name: str) -> None:
+        """Remove um perfil do usuário"""
+        with self._lock:
+            settings = self.settings
+            settings.presets.pop(name, None)
+            if settings.active_preset == name:
+                settings.active_preset = ''
+            self.save_settings()
+
+    def list_presets(self) -> List[str]:
+        """Nomes de todos os perfis disponíveis"""
+        return list(self.settings.all_presets())
+
+    def _read_settings(self) -> AppSettings:
+        self.warnings = []
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            settings = AppSettings.from_dict(self._read_raw(), self.warnings)
         except Exception as e:
-            print(f"Erro ao salvar configuração: {e}")
-    
-    def load_config(self) -> Tuple[str, str, str, str]:
-        """Carrega as configurações do arquivo JSON"""
-        defaults = ('', 'mp3', '192 kbps', '1080')
-        
+            print(f"Erro ao carregar configuração: {e}")
+            settings = AppSettings()
+        self._check_engine(settings.engine, self.warnings)
+        for message in self.warnings:
+            print(f"Aviso: {message}")
+        # Depois da checagem: os valores trocados pelo padrão não são gravados
+        self._base = settings.to_dict()
+        return settings
+
+    def _read_raw(self) -> Dict[str, Any]:
+        """JSON do config.json como está no disco ({} se não existir)"""
         if not self.config_file.exists():
-            return defaults
-        
+            return {}
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("config.json deve conter um objeto JSON")
+        return data
+
+    def _check_engine(self, engine: EngineSettings, problems: List[str]) -> None:
+        """Troca valores inutilizáveis neste ambiente por um padrão seguro
+
+        O problema vai para `problems` (a interface mostra os avisos). O
+        padrão não é gravado: o config.json mantém o valor do usuário.
+        """
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return (
-                    config.get('destination_folder', defaults[0]),
-                    config.get('download_format', defaults[1]),
-                    config.get('audio_quality', defaults[2]),
-                    config.get('video_quality', defaults[3])
-                )
-        except Exception as e:
-            print(f"Erro ao carregar configuração: {e}")
-            return defaults
-    
+            check_algorithm(engine.checksum_algorithm)
+        except ValueError as e:
+            fallback = EngineSettings.checksum_algorithm
+            problems.append(f"Algoritmo de checksum '{engine.checksum_algorithm}' "
+                            f"indisponível ({e}); usando '{fallback}'")
+            engine.checksum_algorithm = fallback
+
+    def _write_atomic(self, data: Dict[str, Any]) -> None:
+        """Escreve num arquivo temporário e renomeia sobre o destino"""
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.config_dir, prefix='.config-', suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_file)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @property
+    def cache_dir(self) -> Path:
+        """Pasta do cache compartilhado do yt-dlp (player e assinaturas)"""
+        return Path(self.settings.engine.cache_dir or self.config_dir / 'cache')
+
+    @property
+    def archive_file(self) -> Path:
+        """Arquivo com os IDs já baixados (formato do yt-dlp)"""
+        return self.config_dir / 'archive.txt'
+
+    @property
+    def seen_file(self) -> Path:
+        """IDs que as inscrições já listaram (não são baixados de novo)"""
+        return self.config_dir / 'seen.txt'
+
+    @property
+    def queue_file(self) -> Path:
+        """Fila persistida padrão (a mesma de `--store data/queue.db`)"""
+        return self.config_dir / 'queue.db'
+
+    @property
+    def thumbnails_dir(self) -> Path:
+        """Cache em disco das miniaturas, uma por ID de vídeo"""
+        return self.config_dir / 'thumbnails'
+
     def get_downloads_folder(self) -> str:
         """Retorna a pasta padrão de downloads do sistema"""
         home = Path.home()
         downloads_folder = home / "Downloads"
         return str(downloads_folder) if downloads_folder.exists() else str(home)
 
+# Perfis disponíveis por padrão
+DEFAULT_PRESETS = {
+    'Arquivo 4K': DownloadPreset('Arquivo 4K', 'mp4', '320 kbps', '2160'),
+    'Podcast MP3': DownloadPreset('Podcast MP3', 'mp3', '128 kbps', '1080'),
+}
+
 # Configurações da aplicação
 APP_CONFIG = {
     'window_title': 'YT 4K Downloader v2.0.1',
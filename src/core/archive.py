@@ -0,0 +1,83 @@
+import os
+import threading
+from typing import Set, Optional, Iterable
+from pathlib import Path
+
+
+class DownloadArchive:
+    """Arquivo de IDs já baixados, compatível com o `download_archive` do yt-dlp
+
+    Cada linha tem o formato "<extractor> <id>" (ex.: "youtube dQw4w9WgXcQ").
+    O yt-dlp acrescenta as linhas ao concluir cada download; aqui apenas
+    lemos o arquivo (recarregando quando ele muda) para consultas rápidas.
+    """
+
+    def __init__(self, archive_file: str, extractor: str = 'youtube'):
+        self.archive_file = Path(archive_file)
+        self.extractor = extractor
+        self._ids: Set[str] = set()
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return str(self.archive_file)
+
+    def contains(self, video_id: str) -> bool:
+        """Verifica se o vídeo já foi baixado"""
+        with self._lock:
+            self._reload_if_changed()
+            return video_id in self._ids
+
+    def add(self, video_id: str) -> None:
+        """Registra um vídeo baixado fora do yt-dlp"""
+        with self._lock:
+            self._reload_if_changed()
+            if video_id in self._ids:
+                return
+            self.archive_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.archive_file, 'a', encoding='utf-8') as f:
+                f.write(f"{self.extractor} {video_id}\n")
+            self._ids.add(video_id)
+            self._mtime = self._current_mtime()
+
+    def add_many(self, video_ids: Iterable[str]) -> int:
+        """Registra vários vídeos de uma vez; devolve quantos eram novos"""
+        with self._lock:
+            self._reload_if_changed()
+            new_ids = [video_id for video_id in dict.fromkeys(video_ids)
+                       if video_id not in self._ids]
+            if not new_ids:
+                return 0
+            self.archive_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.archive_file, 'a', encoding='utf-8') as f:
+                f.writelines(f"{self.extractor} {video_id}\n" for video_id in new_ids)
+            self._ids.update(new_ids)
+            self._mtime = self._current_mtime()
+            return len(new_ids)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._reload_if_changed()
+            return len(self._ids)
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.archive_file).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _reload_if_changed(self) -> None:
+        mtime = self._current_mtime()
+        if mtime == self._mtime:
+            return
+
+        ids = set()
+        if mtime is not None:
+            with open(self.archive_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2:
+                        ids.add(parts[1])
+        self._ids = ids
+        self._mtime = mtime
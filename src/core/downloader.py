@@ -1,19 +1,145 @@
 import os
 import re
-from typing import Optional, Dict, Any, Callable
+import math
+from typing import Optional, Dict, Any, Callable, List, Tuple, TYPE_CHECKING
 from pathlib import Path
 import yt_dlp
+from yt_dlp.utils import download_range_func
+
+from core.integrity import StreamingHasher
+
+if TYPE_CHECKING:
+    from core.extraction import ExtractionPool
 
 class DownloadError(Exception):
     """Exceção customizada para erros de download"""
     pass
 
+# Trecho (início, fim) em segundos; fim = inf significa "até o final"
+Section = Tuple[float, float]
+
+def parse_timestamp(value: str) -> float:
+    """Converte '90', '1:30', '1:02:03' ou '1h2m3s' em segundos"""
+    value = value.strip().lower()
+    if not value:
+        raise DownloadError("Tempo vazio")
+    
+    match = re.fullmatch(r'(?:(\d+)h)?(?:(\d+)m)?(?:(\d+(?:\.\d+)?)s)?', value)
+    if match and any(match.groups()):
+        hours, minutes, seconds = match.groups()
+        return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds or 0)
+    
+    parts = value.split(':')
+    if len(parts) > 3:
+        raise DownloadError(f"Tempo inválido: {value}")
+    try:
+        total = 0.0
+        for part in parts:
+            total = total * 60 + float(part)
+        return total
+    except ValueError:
+        raise DownloadError(f"Tempo inválido: {value}")
+
+def parse_sections(text: str) -> List[Section]:
+    """Converte '1:00-2:30, 10:00-' numa lista de trechos (início, fim)"""
+    sections = []
+    for chunk in text.split(','):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        if '-' not in chunk:
+            raise DownloadError(f"Trecho inválido (use início-fim): {chunk}")
+        
+        start_text, end_text = chunk.split('-', 1)
+        start = parse_timestamp(start_text) if start_text.strip() else 0.0
+        end = parse_timestamp(end_text) if end_text.strip() else float('inf')
+        if end <= start:
+            raise DownloadError(f"O fim do trecho deve ser maior que o início: {chunk}")
+        sections.append((start, end))
+    return sections
+
+def normalize_sections(value: Any) -> List[Section]:
+    """Aceita o texto de `parse_sections` ou uma lista de pares [início, fim]
+
+    No formato de lista, o fim `null` significa "até o final do vídeo".
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return parse_sections(value)
+    if not isinstance(value, (list, tuple)):
+        raise DownloadError("Trechos inválidos: use texto ou uma lista de pares [início, fim]")
+    
+    sections = []
+    for pair in value:
+        if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+            raise DownloadError(f"Trecho inválido (use [início, fim]): {pair!r}")
+        try:
+            start = float(pair[0] or 0)
+            end = float('inf') if pair[1] is None else float(pair[1])
+        except (TypeError, ValueError):
+            raise DownloadError(f"Trecho inválido (use números em segundos): {pair!r}")
+        if math.isnan(start) or math.isnan(end) or math.isinf(start):
+            raise DownloadError(f"Trecho inválido (use números em segundos): {pair!r}")
+        if start < 0 or end <= start:
+            raise DownloadError(f"O fim do trecho deve ser maior que o início: {pair!r}")
+        sections.append((start, end))
+    return sections
+
+def build_info_options(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Opções do yt-dlp para obter informações sem baixar"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        'skip_download': True,
+        # Configurações para evitar processamento de playlist
+        'noplaylist': True,  #  IMPORTANTE: Ignora playlist
+        'playlistend': 1,    # Limita a 1 item
+        'socket_timeout': 30,  # Timeout para evitar travamentos
+        'retries': 3,          # Número de tentativas
+    }
+    ydl_opts.update(overrides or {})
+    return ydl_opts
+
+def compact_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduz o info dict do yt-dlp (que pode ter vários MB) ao que usamos"""
+    return {
+        'id': info.get('id'),
+        'title': info.get('title', 'Unknown'),
+        'duration': info.get('duration', 0),
+        'uploader': info.get('uploader', 'Unknown'),
+        'view_count': info.get('view_count', 0),
+        'thumbnail': info.get('thumbnail'),
+        'formats': [
+            {key: fmt.get(key) for key in ('format_id', 'ext', 'height', 'filesize')}
+            for fmt in info.get('formats') or []
+        ]
+    }
+
+def format_timestamp(seconds: float) -> str:
+    """Formata segundos como m:ss ou h:mm:ss"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
 class VideoDownloader:
     """Classe responsável pelo download de vídeos/áudios"""
     
-    def __init__(self):
+    def __init__(self, ydl_overrides: Optional[Dict[str, Any]] = None,
+                 extraction_pool: Optional['ExtractionPool'] = None,
+                 checksum_algorithm: str = ''):
         self.progress_callback: Optional[Callable] = None
         self.status_callback: Optional[Callable] = None
+        # Opções extras do yt-dlp vindas das configurações (taxa, fragmentos...)
+        self.ydl_overrides: Dict[str, Any] = dict(ydl_overrides or {})
+        self.extraction_pool = extraction_pool
+        # Checksums calculados durante a transferência (vazio = desativado)
+        self.hasher = StreamingHasher(checksum_algorithm) if checksum_algorithm else None
+        self._is_cancelled = False
     
     def set_callbacks(self, progress_callback: Callable = None, 
                      status_callback: Callable = None) -> None:
@@ -21,6 +147,10 @@ class VideoDownloader:
         self.progress_callback = progress_callback
         self.status_callback = status_callback
     
+    def cancel(self) -> None:
+        """Interrompe o download em andamento no próximo aviso de progresso"""
+        self._is_cancelled = True
+    
     def validate_url(self, url: str) -> bool:
         """Valida se a URL é do YouTube ou outros sites suportados"""
         youtube_pattern = r'(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/'
@@ -54,6 +184,18 @@ class VideoDownloader:
         
         return clean_url
     
+    def get_url_timestamp(self, url: str) -> Optional[float]:
+        """Retorna o tempo do parâmetro `t` da URL, se existir"""
+        import urllib.parse as urlparse
+        
+        query_params = urlparse.parse_qs(urlparse.urlparse(url).query)
+        if 't' not in query_params:
+            return None
+        try:
+            return parse_timestamp(query_params['t'][0])
+        except DownloadError:
+            return None
+    
     def sanitize_filename(self, filename: str) -> str:
         """Remove caracteres inválidos do nome do arquivo"""
         invalid_chars = '<>:"/\\|?*'
@@ -66,35 +208,27 @@ class VideoDownloader:
         # Limpa a URL antes de processar
         clean_url = self.clean_url(url)
         
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'skip_download': True,
-            # Configurações para evitar processamento de playlist
-            'noplaylist': True,  #  IMPORTANTE: Ignora playlist
-            'playlistend': 1,    # Limita a 1 item
-            'socket_timeout': 30,  # Timeout para evitar travamentos
-            'retries': 3,          # Número de tentativas
-        }
+        # Com um pool de processos, a extração (CPU) roda fora do GIL deste processo
+        if self.extraction_pool is not None:
+            return self.extraction_pool.extract(clean_url)
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with yt_dlp.YoutubeDL(build_info_options()) as ydl:
                 info = ydl.extract_info(clean_url, download=False)
-                return {
-                    'title': info.get('title', 'Unknown'),
-                    'duration': info.get('duration', 0),
-                    'uploader': info.get('uploader', 'Unknown'),
-                    'view_count': info.get('view_count', 0),
-                    'formats': info.get('formats', [])
-                }
+                return compact_info(info)
         except Exception as e:
             raise DownloadError(f"Erro ao obter informações do vídeo: {str(e)}")
     
     def download(self, url: str, destination_folder: str, 
                 download_format: str, audio_quality: str, 
-                video_quality: str) -> None:
-        """Executa o download do vídeo/áudio"""
+                video_quality: str, 
+                sections: Optional[List[Section]] = None) -> None:
+        """Executa o download do vídeo/áudio
+        
+        Com `sections`, apenas os trechos pedidos são baixados: o ffmpeg
+        busca direto no ponto inicial e copia os streams sem recodificar,
+        cortando no keyframe mais próximo.
+        """
         
         if not self.validate_url(url):
             raise DownloadError("URL inválida. Use apenas URLs do YouTube.")
@@ -112,7 +246,7 @@ class VideoDownloader:
         # Configurações base do yt-dlp
         ydl_opts = self._build_ydl_options(
             destination_folder, download_format, 
-            audio_quality, video_quality
+            audio_quality, video_quality, sections
         )
         
         try:
@@ -136,11 +270,19 @@ class VideoDownloader:
     
     def _build_ydl_options(self, destination_folder: str, 
                           download_format: str, audio_quality: str, 
-                          video_quality: str) -> Dict[str, Any]:
+                          video_quality: str, 
+                          sections: Optional[List[Section]] = None) -> Dict[str, Any]:
         """Constrói as opções do yt-dlp baseado nos parâmetros"""
         
         # Template de saída com sanitização
-        outtmpl = os.path.join(destination_folder, '%(title)s.%(ext)s')
+        if sections:
+            # Cada trecho vira um arquivo próprio
+            outtmpl = os.path.join(
+                destination_folder,
+                '%(title)s [%(section_start)d-%(section_end)d].%(ext)s'
+            )
+        else:
+            outtmpl = os.path.join(destination_folder, '%(title)s.%(ext)s')
         
         ydl_opts = {
             'outtmpl': outtmpl,
@@ -180,10 +322,25 @@ class VideoDownloader:
                 'preferredquality': audio_quality.split()[0],
             })
         
+        if self.hasher is not None:
+            ydl_opts['post_hooks'] = [self._post_hook]
+        
+        if sections:
+            # Baixa só os trechos; corte no keyframe com cópia de stream
+            ydl_opts['download_ranges'] = download_range_func(None, list(sections))
+            ydl_opts['force_keyframes_at_cuts'] = False
+        
+        ydl_opts.update(self.ydl_overrides)
         return ydl_opts
     
     def _progress_hook(self, d: Dict[str, Any]) -> None:
         """Hook para capturar progresso do download"""
+        if self._is_cancelled:
+            raise DownloadError("Download cancelado")
+        
+        if self.hasher is not None:
+            self.hasher.on_progress(d)
+        
         if d['status'] == 'downloading':
             total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
             downloaded_bytes = d.get('downloaded_bytes', 0)
@@ -207,6 +364,16 @@ class VideoDownloader:
             if self.status_callback:
                 self.status_callback("Processando arquivo...")
     
+    def _post_hook(self, filepath: str) -> None:
+        """Registra o checksum do arquivo final, após o pós-processamento"""
+        try:
+            digest = self.hasher.finalize(filepath)
+            if self.status_callback:
+                self.status_callback(f"Checksum ({self.hasher.algorithm}): {digest[:16]}...")
+        except OSError as e:
+            if self.status_callback:
+                self.status_callback(f"Erro ao registrar checksum: {str(e)}")
+    
     def is_playlist_url(self, url: str) -> bool:
         """Verifica se a URL contém parâmetros de playlist"""
         return '&list=' in url or '?list=' in url
@@ -0,0 +1,112 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, Callable, List, Iterable
+
+from core.downloader import DownloadError, build_info_options, compact_info
+
+# Estado de cada processo do pool (criado uma vez no inicializador)
+_worker_ydl = None
+
+
+def _init_worker(ydl_opts: Dict[str, Any]) -> None:
+    """Importa o yt-dlp e cria o YoutubeDL uma única vez por processo"""
+    global _worker_ydl
+    import yt_dlp
+
+    _worker_ydl = yt_dlp.YoutubeDL(ydl_opts)
+
+
+def extract_compact_info(url: str) -> Dict[str, Any]:
+    """Extrai as informações no processo do pool e devolve um dict enxuto
+
+    Só o resultado compacto atravessa o pipe; o info dict completo (JSON
+    do player, formatos, legendas...) nunca sai do processo de trabalho.
+    """
+    try:
+        info = _worker_ydl.extract_info(url, download=False)
+        return compact_info(info)
+    except Exception as e:
+        raise DownloadError(f"Erro ao obter informações do vídeo: {str(e)}")
+
+
+class ExtractionPool:
+    """Pool de processos para a extração de informações dos vídeos
+
+    A extração é principalmente CPU (JSON/HTML grandes e interpretação do
+    JS do player para as assinaturas). Em threads ela disputa o GIL com a
+    interface e com os outros jobs; aqui cada processo tem seu próprio
+    interpretador, com o yt-dlp já importado e um YoutubeDL reutilizado.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 ydl_overrides: Optional[Dict[str, Any]] = None,
+                 probe_fn: Callable[[str], Dict[str, Any]] = extract_compact_info):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.probe_fn = probe_fn
+        self.ydl_options = build_info_options(ydl_overrides)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # 'spawn' evita herdar por fork as threads do Qt e dos downloads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.ydl_options,)
+        )
+
+    def warm_up(self) -> None:
+        """Sobe todos os processos agora, em vez de na primeira extração"""
+        futures = [self._submit(os.getpid) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, url: str) -> Future:
+        """Agenda a extração e devolve o Future com o dict compacto"""
+        return self._submit(self.probe_fn, url)
+
+    def _submit(self, fn: Callable, *args: Any) -> Future:
+        """Agenda no pool; um pool quebrado é trocado por um novo
+
+        Se um processo de trabalho morre (ex.: falta de memória), o
+        ProcessPoolExecutor fica inutilizável para sempre: as extrações em
+        andamento falham e novos pedidos levantariam BrokenProcessPool.
+        """
+        executor = self._executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            return self._replace(executor).submit(fn, *args)
+
+    def _replace(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        with self._lock:
+            # Outra thread pode já ter trocado o pool
+            if self._executor is broken and not self._closed:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+            return self._executor
+
+    def extract(self, url: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Extrai as informações de um vídeo, bloqueando até o resultado"""
+        try:
+            return self.submit(url).result(timeout)
+        except DownloadError:
+            raise
+        except Exception as e:
+            raise DownloadError(f"Erro ao obter informações do vídeo: {str(e)}")
+
+    def extract_many(self, urls: Iterable[str]) -> List[Dict[str, Any]]:
+        """Extrai vários vídeos em paralelo, mantendo a ordem das URLs"""
+        futures = [self.submit(url) for url in urls]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+        executor.shutdown(wait=wait, cancel_futures=True)
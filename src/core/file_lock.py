@@ -0,0 +1,54 @@
+import os
+import time
+import errno
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Erros do msvcrt.locking que indicam apenas "ainda travado por outro processo"
+_LOCK_BUSY_ERRORS = (errno.EDEADLK, errno.EACCES)
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Trava exclusiva entre processos sobre um arquivo auxiliar
+
+    Usa fcntl.flock no Linux/macOS e msvcrt.locking no Windows. O arquivo
+    de trava é separado dos dados, que podem ser substituídos por
+    renomeação enquanto a trava está ativa.
+    """
+    with open(path, 'a+b') as lock:
+        _acquire(lock.fileno())
+        try:
+            yield
+        finally:
+            _release(lock.fileno())
+
+
+def _acquire(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError as e:
+            # LK_LOCK desiste após ~10s ainda travado; outros erros sobem
+            if e.errno not in _LOCK_BUSY_ERRORS:
+                raise
+            time.sleep(0.1)
+
+
+def _release(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,256 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Iterator
+
+from core.file_lock import file_lock
+
+try:
+    import xxhash
+except ImportError:  # Dependência opcional
+    xxhash = None
+
+INDEX_FILENAME = '.yt4k-checksums.jsonl'
+LOCK_FILENAME = '.yt4k-checksums.lock'
+CHUNK_SIZE = 1024 * 1024
+
+
+def new_hasher(algorithm: str):
+    """Cria o objeto de hash; xxhash só se o pacote estiver instalado"""
+    if algorithm.startswith('xxh'):
+        if xxhash is None:
+            raise ValueError("Instale o pacote 'xxhash' para usar este algoritmo")
+        if not hasattr(xxhash, algorithm):
+            raise ValueError(f"Algoritmo de hash desconhecido: {algorithm}")
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+
+def check_algorithm(algorithm: str) -> None:
+    """Levanta ValueError se o algoritmo não puder ser usado aqui"""
+    if algorithm:
+        new_hasher(algorithm)
+
+
+def hash_file(path: str, algorithm: str) -> str:
+    """Calcula o hash de um arquivo inteiro"""
+    hasher = new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ChecksumIndex:
+    """Índice de checksums de uma pasta (arquivo JSON Lines oculto na própria pasta)
+
+    Cada arquivo concluído acrescenta uma linha com algoritmo, hash,
+    tamanho e mtime; a última linha de cada nome vale. Acrescentar uma
+    linha custa o mesmo com 10 ou 50 mil arquivos na pasta, e a trava de
+    arquivo (fcntl/msvcrt) permite que vários processos (GUI, `run`,
+    workers) gravem na mesma pasta. A verificação compacta o índice.
+    """
+
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, folder: str):
+        self.folder = Path(folder)
+        self.index_file = self.folder / INDEX_FILENAME
+        self.lock_file = self.folder / LOCK_FILENAME
+        with self._locks_guard:
+            self._lock = self._locks.setdefault(str(self.index_file.resolve()),
+                                                threading.Lock())
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        if not self.index_file.exists():
+            return entries
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta (processo interrompido na escrita)
+                    entries[entry.pop('name')] = entry
+        except OSError as e:
+            print(f"Erro ao carregar índice de checksums: {e}")
+        return entries
+
+    def record(self, path: str, algorithm: str, digest: str) -> None:
+        """Registra o checksum de um arquivo da pasta"""
+        stat = os.stat(path)
+        entry = {
+            'name': os.path.basename(path),
+            'algorithm': algorithm,
+            'digest': digest,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._locked():
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def compact(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Regrava o índice com uma linha por arquivo, aplicando `updates`
+
+        O índice é relido sob a trava, então linhas acrescentadas por
+        outros processos enquanto a verificação rodava são preservadas.
+        """
+        with self._locked():
+            current = self.load()
+            current.update(updates)
+            fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix='.checksums-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    for name, entry in sorted(current.items()):
+                        f.write(json.dumps({'name': name, **entry}, ensure_ascii=False) + '\n')
+                os.replace(tmp_path, self.index_file)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Trava entre threads e entre processos"""
+        with self._lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.lock_file):
+                yield
+
+
+class StreamingHasher:
+    """Calcula o hash dos arquivos enquanto o yt-dlp os grava
+
+    A cada aviso de progresso, lê apenas os bytes acrescentados desde o
+    último aviso. Esses bytes acabaram de ser escritos e ainda estão no
+    cache de páginas do sistema, então o hash sai sem reler o arquivo do
+    disco depois do download.
+
+    Quando um pós-processamento (mesclagem de áudio/vídeo, conversão para
+    mp3) gera um arquivo novo, o hash final é calculado uma única vez
+    sobre esse arquivo recém-escrito.
+    """
+
+    def __init__(self, algorithm: str = 'sha256'):
+        new_hasher(algorithm)  # Valida o algoritmo logo na criação
+        self.algorithm = algorithm
+        self._states: Dict[str, Tuple[Any, int]] = {}   # arquivo -> (hasher, offset)
+        self._digests: Dict[str, Tuple[str, int]] = {}  # arquivo -> (hash, tamanho)
+        # Com downloads fragmentados o yt-dlp chama o hook de várias threads
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def on_progress(self, d: Dict[str, Any]) -> None:
+        """Deve ser chamado pelo progress hook do yt-dlp"""
+        filename = d.get('filename')
+        if not filename:
+            return
+
+        with self._key_lock(filename):
+            if d['status'] == 'downloading':
+                self._consume(filename, d.get('tmpfilename') or filename)
+            elif d['status'] == 'finished':
+                self._consume(filename, filename)
+                hasher, offset = self._states.pop(filename, (None, 0))
+                if hasher is not None:
+                    self._digests[filename] = (hasher.hexdigest(), offset)
+            elif d['status'] == 'error':
+                self._states.pop(filename, None)
+
+    def finalize(self, filepath: str) -> str:
+        """Registra o checksum do arquivo final no índice da pasta"""
+        size = os.path.getsize(filepath)
+        with self._key_lock(filepath):
+            digest, hashed_size = self._digests.pop(filepath, (None, -1))
+        with self._guard:
+            self._key_locks.pop(filepath, None)
+        if digest is None or hashed_size != size:
+            # Arquivo gerado no pós-processamento: hash único do arquivo novo
+            digest = hash_file(filepath, self.algorithm)
+
+        ChecksumIndex(os.path.dirname(filepath) or '.').record(filepath, self.algorithm, digest)
+        return digest
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _consume(self, key: str, path: str) -> None:
+        """Precisa ser chamado com a trava de `key`"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+
+        hasher, offset = self._states.get(key, (None, 0))
+        if hasher is None or size < offset:
+            # Arquivo novo ou reiniciado: recomeça o hash do zero
+            hasher, offset = new_hasher(self.algorithm), 0
+
+        if size > offset:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                remaining = size - offset
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    remaining -= len(chunk)
+                    offset += len(chunk)
+
+        self._states[key] = (hasher, offset)
+
+
+def verify_folder(folder: str, full: bool = False) -> List[Tuple[str, str]]:
+    """Confere os arquivos do índice da pasta
+
+    Só recalcula o hash dos arquivos cujo tamanho ou mtime mudou (ou de
+    todos, com `full`). Retorna (arquivo, resultado), onde o resultado é
+    'ok', 'inalterado', 'corrompido', 'ausente' ou 'sem suporte' (hash
+    xxhash sem o pacote instalado). Ao final o índice é compactado.
+    """
+    index = ChecksumIndex(folder)
+    entries = index.load()
+    results = []
+    updates = {}
+
+    for name, entry in sorted(entries.items()):
+        path = os.path.join(folder, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            results.append((name, 'ausente'))
+            continue
+
+        unchanged = stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']
+        if unchanged and not full:
+            results.append((name, 'inalterado'))
+            continue
+
+        try:
+            digest = hash_file(path, entry['algorithm'])
+        except ValueError:
+            results.append((name, 'sem suporte'))
+            continue
+
+        if digest == entry['digest']:
+            results.append((name, 'ok'))
+            # Conteúdo igual (só o mtime mudou): atualiza para pular da próxima vez
+            updates[name] = {**entry, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        else:
+            results.append((name, 'corrompido'))
+
+    if entries:
+        index.compact(updates)
+    return results
@@ -0,0 +1,433 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import itertools
+import threading
+from pathlib import Path
+from typing import Optional, List, Iterable, Any, Set
+
+from core.jobs import (BaseJobQueue, DownloadJob, PENDING, RUNNING, DONE,
+                       FAILED, CANCELLED)
+
+
+class SQLiteJobQueue(BaseJobQueue):
+    """Fila de downloads persistida em SQLite
+
+    Os jobs pendentes ficam no disco e só o job retirado por `get` é
+    carregado na memória, então o consumo fica estável mesmo com lotes de
+    dezenas de milhares de URLs.
+
+    Vários processos podem consumir a mesma fila. Cada job retirado recebe
+    um "lease" em nome do `worker_id`, renovado por uma thread de
+    heartbeat enquanto o processo vive. Se o processo morre ou trava, o
+    lease expira e o job volta a ficar pendente para outro worker. A
+    conclusão é registrada uma única vez na tabela `completions`;
+    conclusões repetidas ou de um worker que perdeu o lease são ignoradas.
+
+    O banco usa o modo WAL, que depende de memória compartilhada entre os
+    processos: o arquivo precisa estar num disco local, nunca numa pasta
+    de rede (NFS/SMB). Workers de outras máquinas usam a mesma fila pela
+    API de `serve` (`lease_next`, `renew_leases` e `complete_leased`,
+    ver services.queue_client); este arquivo fica só na máquina da API.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id     TEXT NOT NULL UNIQUE,
+            video_id   TEXT,
+            priority   INTEGER NOT NULL DEFAULT 0,
+            status     TEXT NOT NULL,
+            error      TEXT NOT NULL DEFAULT '',
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            data       TEXT NOT NULL,
+            worker_id     TEXT,
+            lease_expires REAL,
+            attempts      INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS jobs_next
+            ON jobs (status, priority DESC, seq);
+        CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_video
+            ON jobs (video_id) WHERE status IN ('pending', 'running');
+        CREATE TABLE IF NOT EXISTS completions (
+            job_id       TEXT PRIMARY KEY,
+            worker_id    TEXT,
+            status       TEXT NOT NULL,
+            error        TEXT NOT NULL DEFAULT '',
+            completed_at REAL NOT NULL
+        );
+    """
+
+    POLL_INTERVAL = 1.0  # Consulta o disco mesmo sem aviso (outros processos)
+
+    def __init__(self, db_path: str, batch_size: int = 1000,
+                 worker_id: Optional[str] = None, lease_seconds: float = 60.0,
+                 max_attempts: int = 3, read_only: bool = False):
+        super().__init__()
+        self.db_path = Path(db_path)
+        if not read_only:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._owned: Set[str] = set()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        if read_only:
+            # Só consulta (ex.: a interface): não cria o banco dos workers
+            self._conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro",
+                                         uri=True, timeout=30,
+                                         check_same_thread=False,
+                                         isolation_level=None)
+            return
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30,
+                                     check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+        with self._lock:
+            self._conn.close()
+
+    def put(self, job: DownloadJob) -> bool:
+        job.status = PENDING
+        with self._cond:
+            inserted = self._insert([job])
+            self._cond.notify()
+        if inserted:
+            self.publish('queued', job)
+        return bool(inserted)
+
+    def put_many(self, jobs: Iterable[DownloadJob]) -> int:
+        """Grava os jobs em lotes, sem mantê-los todos na memória
+
+        Não publica eventos por job, para não inundar os ouvintes em
+        importações grandes.
+        """
+        total = 0
+        iterator = iter(jobs)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                break
+            for job in batch:
+                job.status = PENDING
+            with self._cond:
+                total += self._insert(batch)
+                self._cond.notify_all()
+        return total
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DownloadJob]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._claim_next(self.worker_id, self.lease_seconds)
+                if job is not None:
+                    self._owned.add(job.job_id)
+                    self._ensure_heartbeat()
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                wait = self.POLL_INTERVAL if remaining is None else min(remaining, self.POLL_INTERVAL)
+                self._cond.wait(wait)
+        self.publish('started', job)
+        return job
+
+    def complete(self, job_id: str, error: str = '') -> None:
+        """Conclui o job uma única vez
+
+        Só vale para um job em andamento com o lease deste worker: se o
+        lease expirou (o job voltou para a fila ou outro worker o assumiu),
+        a conclusão é ignorada.
+        """
+        with self._lock:
+            self._owned.discard(job_id)
+        self.complete_leased(self.worker_id, job_id, error)
+
+    # --- Leases em nome de outros workers (remotos, via API) ------------
+
+    def lease_next(self, worker_id: str, lease_seconds: float) -> Optional[DownloadJob]:
+        """Retira o próximo job pendente em nome de `worker_id`, sem esperar
+
+        O lease não é renovado por este processo: o worker precisa chamar
+        `renew_leases` antes que ele expire.
+        """
+        with self._lock:
+            job = self._claim_next(worker_id, lease_seconds)
+        if job is not None:
+            self.publish('started', job)
+        return job
+
+    def renew_leases(self, worker_id: str, job_ids: Iterable[str], lease_seconds: float,
+                     renew: Optional[Iterable[str]] = None) -> List[str]:
+        """Renova os leases de `worker_id` e devolve os jobs que ele ainda tem
+
+        `renew` limita quais jobs são renovados (padrão: todos de
+        `job_ids`); os demais só são conferidos.
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return []
+        renew = job_ids if renew is None else list(set(renew) & set(job_ids))
+        with self._lock:
+            if renew:
+                placeholders = ', '.join('?' for _ in renew)
+                self._conn.execute(
+                    f"UPDATE jobs SET lease_expires = ? WHERE status = ? AND worker_id = ? "
+                    f"AND job_id IN ({placeholders})",
+                    (time.time() + lease_seconds, RUNNING, worker_id, *renew)
+                )
+            placeholders = ', '.join('?' for _ in job_ids)
+            kept = {row[0] for row in self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE status = ? AND worker_id = ? "
+                f"AND job_id IN ({placeholders})",
+                (RUNNING, worker_id, *job_ids)
+            )}
+        return [job_id for job_id in job_ids if job_id in kept]
+
+    def complete_leased(self, worker_id: str, job_id: str, error: str = '') -> bool:
+        """Conclui o job se `worker_id` ainda tiver o lease; retorna se concluiu"""
+        status = FAILED if error else DONE
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ?, "
+                    "lease_expires = NULL WHERE job_id = ? AND status = ? AND worker_id = ?",
+                    (status, error, now, job_id, RUNNING, worker_id)
+                )
+                if cursor.rowcount:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO completions "
+                        "(job_id, worker_id, status, error, completed_at) VALUES (?, ?, ?, ?, ?)",
+                        (job_id, worker_id, status, error, now)
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            if not cursor.rowcount:
+                return False
+            job = self.get_job(job_id)
+        self.publish('finished', job)
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._transition(job_id, CANCELLED, (PENDING, RUNNING))
+        if job is None:
+            return False
+        with self._lock:
+            self._owned.discard(job_id)
+        self.publish('cancelled', job)
+        return True
+
+    def requeue_expired(self) -> int:
+        """Devolve à fila os jobs cujo worker parou de renovar o lease"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                count = self._requeue_expired()
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return count
+
+    def completion(self, job_id: str) -> Optional[dict]:
+        """Registro de conclusão do job (worker, estado, horário), se houver"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT worker_id, status, error, completed_at FROM completions "
+                "WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('worker_id', 'status', 'error', 'completed_at'), row))
+
+    def set_priority(self, job_id: str, priority: int) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET priority = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = ?",
+                (priority, time.time(), job_id, PENDING)
+            )
+            if cursor.rowcount == 0:
+                return False
+            job = self.get_job(job_id)
+        self.publish('reprioritized', job)
+        return True
+
+    def get_job(self, job_id: str) -> Optional[DownloadJob]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, priority, status, error FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: Optional[int] = 100,
+                  offset: int = 0, newest_first: bool = False) -> List[DownloadJob]:
+        query = "SELECT data, priority, status, error FROM jobs"
+        params: List[Any] = []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += f" ORDER BY seq {'DESC' if newest_first else 'ASC'} LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def has_video(self, video_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE video_id = ? AND status IN (?, ?) LIMIT 1",
+                (video_id, PENDING, RUNNING)
+            ).fetchone()
+        return row is not None
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def _insert(self, jobs: List[DownloadJob]) -> int:
+        now = time.time()
+        rows = [(job.job_id, job.video_id, job.priority, job.status, job.error,
+                 job.created_at, now, json.dumps(job.to_dict(), ensure_ascii=False))
+                for job in jobs]
+        self._conn.execute('BEGIN')
+        try:
+            before = self._conn.total_changes
+            # Vídeos já ativos são ignorados pelo índice único parcial
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (job_id, video_id, priority, status, "
+                "error, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            inserted = self._conn.total_changes - before
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        return inserted
+
+    def _claim_next(self, worker_id: str, lease_seconds: float) -> Optional[DownloadJob]:
+        # BEGIN IMMEDIATE garante que só um consumidor retire cada job,
+        # inclusive entre processos diferentes
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._requeue_expired()
+            row = self._conn.execute(
+                "SELECT job_id, data, priority, status, error FROM jobs "
+                "WHERE status = ? ORDER BY priority DESC, seq LIMIT 1",
+                (PENDING,)
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, worker_id = ?, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE job_id = ?",
+                    (RUNNING, now, worker_id, now + lease_seconds, row[0])
+                )
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        job = self._row_to_job(row[1:])
+        job.status = RUNNING
+        return job
+
+    def _transition(self, job_id: str, status: str, allowed: tuple,
+                    error: str = '') -> Optional[DownloadJob]:
+        placeholders = ', '.join('?' for _ in allowed)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                f"WHERE job_id = ? AND status IN ({placeholders})",
+                (status, error, time.time(), job_id, *allowed)
+            )
+            if cursor.rowcount == 0:
+                return None
+            return self.get_job(job_id)
+
+    def _requeue_expired(self) -> int:
+        """Precisa rodar dentro de uma transação"""
+        now = time.time()
+        # Jobs que já esgotaram as tentativas (ex.: derrubam o worker) falham de vez
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ?, lease_expires = NULL "
+            "WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?) "
+            "AND attempts >= ?",
+            (FAILED, "Worker parou de responder em todas as tentativas", now,
+             RUNNING, now, self.max_attempts)
+        )
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)",
+            (PENDING, now, RUNNING, now)
+        )
+        return cursor.rowcount
+
+    def _ensure_heartbeat(self) -> None:
+        if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+            self._heartbeat_stop.clear()
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop, name='job-lease-heartbeat', daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._heartbeat_stop.wait(self.lease_seconds / 3):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as e:
+                print(f"Erro ao renovar lease dos jobs: {e}")
+
+    def heartbeat(self) -> None:
+        """Renova o lease dos jobs deste worker e detecta os que foram perdidos
+
+        Jobs recusados pelo `set_lease_guard` não são renovados: expiram e
+        voltam para a fila.
+        """
+        with self._lock:
+            owned = list(self._owned)
+            if not owned:
+                return
+            guard = self._lease_guard
+            kept = set(self.renew_leases(
+                self.worker_id, owned, self.lease_seconds,
+                renew=[job_id for job_id in owned if guard is None or guard(job_id)]
+            ))
+            lost = [job_id for job_id in owned if job_id not in kept]
+            self._owned.difference_update(lost)
+
+        # Cancelado por outro processo ou lease assumido por outro worker
+        for job_id in lost:
+            job = self.get_job(job_id)
+            if job is not None:
+                self.publish('lease_lost', job)
+
+    def _row_to_job(self, row) -> DownloadJob:
+        data, priority, status, error = row
+        job = DownloadJob.from_dict(json.loads(data))
+        job.priority = priority
+        job.status = status
+        job.error = error
+        return job
@@ -0,0 +1,282 @@
+import time
+import heapq
+import uuid
+import threading
+from collections import deque
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable, Deque
+
+# Estados possíveis de um job
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+ACTIVE_STATES = (PENDING, RUNNING)
+
+# Faixa aceita para a prioridade (inteiro de 64 bits, como no SQLite)
+MIN_PRIORITY = -2 ** 63
+MAX_PRIORITY = 2 ** 63 - 1
+
+# Recebe o nome do evento e os dados (sempre com 'job_id')
+JobListener = Callable[[str, Dict[str, Any]], None]
+# Diz se um job retirado ainda está sendo processado (ver set_lease_guard)
+LeaseGuard = Callable[[str], bool]
+
+
+@dataclass
+class DownloadJob:
+    """Pedido de download enfileirado"""
+    url: str
+    destination_folder: str
+    download_format: str = 'mp3'
+    audio_quality: str = '192 kbps'
+    video_quality: str = '1080'
+    priority: int = 0
+    video_id: Optional[str] = None
+    title: str = ''
+    source: str = ''              # Origem do job (ex.: URL da inscrição)
+    # Trechos [início, fim] em segundos; fim None = até o final do vídeo
+    sections: List[List[Optional[float]]] = field(default_factory=list)
+    skip_archived: bool = False   # Pula vídeos já baixados (só jobs das inscrições)
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = PENDING
+    error: str = ''
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DownloadJob':
+        names = cls.__dataclass_fields__.keys()
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+class BaseJobQueue(ABC):
+    """Interface comum das filas de download
+
+    Os jobs saem por prioridade (maior primeiro) e, dentro da mesma
+    prioridade, por ordem de chegada. Um vídeo que já está pendente ou
+    em andamento não é enfileirado de novo.
+
+    Mudanças de estado são publicadas aos ouvintes registrados em
+    `add_listener`; os ouvintes rodam na thread que causou o evento e
+    devem retornar rápido.
+    """
+
+    def __init__(self):
+        self._listeners: List[JobListener] = []
+        self._listeners_lock = threading.Lock()
+        self._lease_guard: Optional[LeaseGuard] = None
+
+    @abstractmethod
+    def put(self, job: DownloadJob) -> bool:
+        """Enfileira um job; retorna False se o vídeo já estiver na fila"""
+
+    def put_many(self, jobs: Iterable[DownloadJob]) -> int:
+        """Enfileira vários jobs; retorna quantos foram aceitos"""
+        return sum(1 for job in jobs if self.put(job))
+
+    @abstractmethod
+    def get(self, timeout: Optional[float] = None) -> Optional[DownloadJob]:
+        """Retira o próximo job pendente, marcando-o como em andamento"""
+
+    @abstractmethod
+    def complete(self, job_id: str, error: str = '') -> None:
+        """Marca o job como concluído ou com falha"""
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> bool:
+        """Cancela um job pendente ou em andamento"""
+
+    @abstractmethod
+    def set_priority(self, job_id: str, priority: int) -> bool:
+        """Altera a prioridade de um job pendente"""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[DownloadJob]:
+        """Busca um job pelo ID"""
+
+    @abstractmethod
+    def list_jobs(self, status: Optional[str] = None, limit: Optional[int] = 100,
+                  offset: int = 0, newest_first: bool = False) -> List[DownloadJob]:
+        """Lista os jobs por ordem de chegada, opcionalmente filtrando pelo estado
+
+        `limit=None` lista todos; `newest_first` inverte a ordem.
+        """
+
+    @abstractmethod
+    def has_video(self, video_id: str) -> bool:
+        """Verifica se o vídeo está pendente ou em andamento"""
+
+    @abstractmethod
+    def pending_count(self) -> int:
+        """Número de jobs aguardando na fila"""
+
+    # Leases em nome de workers de outras máquinas (rotas /leases da API).
+    # Só as filas compartilhadas (SQLiteJobQueue) implementam.
+
+    def lease_next(self, worker_id: str, lease_seconds: float) -> Optional[DownloadJob]:
+        """Retira o próximo job pendente em nome de `worker_id`, sem esperar"""
+        raise NotImplementedError("Esta fila não aceita workers remotos")
+
+    def renew_leases(self, worker_id: str, job_ids: Iterable[str], lease_seconds: float,
+                     renew: Optional[Iterable[str]] = None) -> List[str]:
+        """Renova os leases e devolve os jobs que `worker_id` ainda tem"""
+        raise NotImplementedError("Esta fila não aceita workers remotos")
+
+    def complete_leased(self, worker_id: str, job_id: str, error: str = '') -> bool:
+        """Conclui o job se `worker_id` ainda tiver o lease"""
+        raise NotImplementedError("Esta fila não aceita workers remotos")
+
+    def set_lease_guard(self, guard: Optional[LeaseGuard]) -> None:
+        """Define quais jobs retirados continuam com o lease renovado
+
+        Nas filas compartilhadas, o heartbeat só renova o lease dos jobs
+        para os quais `guard(job_id)` é verdadeiro. Um job abandonado (a
+        thread que o processava morreu) deixa de ser renovado e volta para
+        a fila quando o lease expira.
+        """
+        self._lease_guard = guard
+
+    def add_listener(self, listener: JobListener) -> None:
+        with self._listeners_lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: JobListener) -> None:
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish(self, event: str, job: DownloadJob, **data: Any) -> None:
+        """Envia um evento aos ouvintes"""
+        payload = {'job_id': job.job_id, 'status': job.status, **data}
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event, payload)
+            except Exception as e:
+                print(f"Erro no ouvinte da fila: {e}")
+
+
+class JobQueue(BaseJobQueue):
+    """Fila de downloads em memória, segura para várias threads
+
+    Guarda só os `max_finished` jobs finalizados mais recentes; os mais
+    antigos são descartados para a memória não crescer num `watch` ou
+    `serve` que roda por semanas.
+    """
+
+    def __init__(self, max_finished: int = 1000):
+        super().__init__()
+        self.max_finished = max_finished
+        self._jobs: Dict[str, DownloadJob] = {}
+        self._finished: Deque[str] = deque()
+        self._heap: List[Tuple[int, int, str]] = []
+        self._counter = 0
+        self._cond = threading.Condition()
+
+    def put(self, job: DownloadJob) -> bool:
+        with self._cond:
+            if job.video_id and self._has_active_video(job.video_id):
+                return False
+            job.status = PENDING
+            self._jobs[job.job_id] = job
+            self._push(job)
+            self._cond.notify()
+        self.publish('queued', job)
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DownloadJob]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._pop_pending()
+                if job is not None:
+                    job.status = RUNNING
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+        self.publish('started', job)
+        return job
+
+    def complete(self, job_id: str, error: str = '') -> None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE_STATES:
+                return
+            job.status = FAILED if error else DONE
+            job.error = error
+            self._trim(job)
+        self.publish('finished', job)
+
+    def cancel(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE_STATES:
+                return False
+            job.status = CANCELLED
+            self._trim(job)
+        self.publish('cancelled', job)
+        return True
+
+    def set_priority(self, job_id: str, priority: int) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PENDING:
+                return False
+            job.priority = priority
+            self._push(job)
+        self.publish('reprioritized', job)
+        return True
+
+    def get_job(self, job_id: str) -> Optional[DownloadJob]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None, limit: Optional[int] = 100,
+                  offset: int = 0, newest_first: bool = False) -> List[DownloadJob]:
+        with self._cond:
+            jobs = [job for job in self._jobs.values()
+                    if status is None or job.status == status]
+        if newest_first:
+            jobs.reverse()
+        end = None if limit is None else offset + limit
+        return jobs[offset:end]
+
+    def has_video(self, video_id: str) -> bool:
+        with self._cond:
+            return self._has_active_video(video_id)
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(1 for job in self._jobs.values() if job.status == PENDING)
+
+    def _has_active_video(self, video_id: str) -> bool:
+        return any(job.video_id == video_id and job.status in ACTIVE_STATES
+                   for job in self._jobs.values())
+
+    def _trim(self, job: DownloadJob) -> None:
+        """Registra o job finalizado e descarta os mais antigos além do limite"""
+        self._finished.append(job.job_id)
+        while len(self._finished) > self.max_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _push(self, job: DownloadJob) -> None:
+        self._counter += 1
+        heapq.heappush(self._heap, (-job.priority, self._counter, job.job_id))
+
+    def _pop_pending(self) -> Optional[DownloadJob]:
+        while self._heap:
+            priority, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            # Entradas antigas (job reprioritizado ou já processado) são descartadas
+            if job is not None and job.status == PENDING and -priority == job.priority:
+                return job
+        return None
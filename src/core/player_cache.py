@@ -0,0 +1,151 @@
+import os
+import time
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any
+import yt_dlp
+from yt_dlp.version import __version__ as YT_DLP_VERSION
+
+from core.downloader import build_info_options
+
+
+class PlayerCache:
+    """Cache compartilhado do JS do player e das funções de assinatura
+
+    Todos os processos e threads apontam o `cachedir` do yt-dlp para a
+    mesma pasta, então o JS do player baixado e as funções de assinatura
+    derivadas por um job servem para todos os outros, inclusive depois de
+    reiniciar. O yt-dlp grava cada entrada com escrita atômica (arquivo
+    temporário + renomeação), o que torna a pasta segura entre processos.
+
+    A pasta é versionada pelo esquema deste cache e pela versão do yt-dlp:
+    ao atualizar o yt-dlp, o cache antigo deixa de ser usado e é removido.
+    """
+
+    SCHEMA_VERSION = 1
+    # Vídeo curto e estável, usado só para baixar o player e derivar as assinaturas
+    WARMUP_URL = 'https://www.youtube.com/watch?v=jNQXAC9IVRw'
+    MARKER_FILE = '.warmed'
+    USAGE_FILE = '.last-used'  # Tocado a cada processo que passa a usar o cache
+    LOCK_FILE = '.warmup.lock'
+    LOCK_TIMEOUT = 300  # Segundos até considerar abandonado o lock de outro processo
+
+    def __init__(self, base_dir: str, max_age_hours: float = 12.0):
+        self.base_dir = Path(base_dir)
+        self.max_age = max_age_hours * 3600
+        self.status_callback = None
+
+    @property
+    def cache_dir(self) -> Path:
+        return self.base_dir / f"v{self.SCHEMA_VERSION}-yt-dlp-{YT_DLP_VERSION}"
+
+    def set_callbacks(self, status_callback=None) -> None:
+        """Define callback de status"""
+        self.status_callback = status_callback
+
+    def ydl_options(self) -> Dict[str, Any]:
+        """Opções do yt-dlp que apontam para o cache compartilhado"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / self.USAGE_FILE).touch()
+        return {'cachedir': str(self.cache_dir)}
+
+    def is_warm(self) -> bool:
+        """O cache foi aquecido há menos de `max_age`?"""
+        try:
+            age = time.time() - os.stat(self.cache_dir / self.MARKER_FILE).st_mtime
+        except FileNotFoundError:
+            return False
+        return age < self.max_age
+
+    def warm_up(self, url: Optional[str] = None, force: bool = False) -> bool:
+        """Baixa o player e deriva as assinaturas, se o cache estiver frio
+
+        Apenas um processo aquece por vez; os demais retornam sem esperar e
+        passam a usar o cache assim que ele estiver gravado.
+        """
+        if not force and self.is_warm():
+            return False
+
+        self.prune_stale_versions()
+        options = self.ydl_options()
+        if not self._acquire_lock():
+            return False
+
+        try:
+            self._notify("Aquecendo cache do player...")
+            with yt_dlp.YoutubeDL(build_info_options(options)) as ydl:
+                ydl.extract_info(url or self.WARMUP_URL, download=False)
+            (self.cache_dir / self.MARKER_FILE).touch()
+            self._notify("Cache do player pronto")
+            return True
+        except Exception as e:
+            self._notify(f"Erro ao aquecer cache do player: {str(e)}")
+            return False
+        finally:
+            self._release_lock()
+
+    def warm_up_async(self) -> threading.Thread:
+        """Aquece o cache em segundo plano"""
+        thread = threading.Thread(target=self.warm_up, name='player-cache-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self) -> None:
+        """Descarta o cache da versão atual (ex.: player mudou e assinaturas falham)"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def prune_stale_versions(self, min_idle_hours: float = 168.0) -> None:
+        """Remove caches de outras versões que não são usados há algum tempo
+
+        A última atividade é o mtime mais recente dentro da pasta (o yt-dlp
+        grava em subpastas, então o mtime da própria pasta não muda). O
+        tempo de folga evita apagar a pasta de um processo, talvez em outra
+        máquina, ainda rodando com a versão anterior do yt-dlp.
+        """
+        if not self.base_dir.exists():
+            return
+        now = time.time()
+        for entry in self.base_dir.iterdir():
+            if not entry.is_dir() or entry == self.cache_dir:
+                continue
+            if now - self._last_activity(entry) > min_idle_hours * 3600:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _last_activity(self, folder: Path) -> float:
+        """mtime mais recente entre a pasta, as subpastas e os arquivos"""
+        newest = 0.0
+        for root, dirs, files in os.walk(folder):
+            for name in [root, *(os.path.join(root, item) for item in dirs + files)]:
+                try:
+                    newest = max(newest, os.stat(name).st_mtime)
+                except FileNotFoundError:
+                    pass
+        return newest
+
+    def _acquire_lock(self) -> bool:
+        lock_path = self.cache_dir / self.LOCK_FILE
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return True
+        except FileExistsError:
+            # Lock abandonado por um processo que caiu durante o aquecimento
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > self.LOCK_TIMEOUT:
+                    os.unlink(lock_path)
+                    return self._acquire_lock()
+            except FileNotFoundError:
+                return self._acquire_lock()
+            return False
+
+    def _release_lock(self) -> None:
+        try:
+            os.unlink(self.cache_dir / self.LOCK_FILE)
+        except FileNotFoundError:
+            pass
+
+    def _notify(self, message: str) -> None:
+        if self.status_callback:
+            self.status_callback(message)
@@ -0,0 +1,144 @@
+import gc
+import threading
+from typing import Optional, Dict, Any, Callable, List
+
+from core.downloader import VideoDownloader, DownloadError
+from core.jobs import BaseJobQueue, DownloadJob
+
+
+class QueueRunner:
+    """Executa os jobs de uma fila com um número limitado de threads
+
+    O progresso e o status de cada job são publicados na própria fila
+    (eventos 'progress' e 'status'), e um job cancelado na fila (ou cujo
+    lease foi perdido) tem o download interrompido.
+    """
+
+    def __init__(self, queue: BaseJobQueue, max_workers: int = 2,
+                 ydl_overrides: Optional[Dict[str, Any]] = None,
+                 archive_file: Optional[str] = None,
+                 checksum_algorithm: str = ''):
+        self.queue = queue
+        self.checksum_algorithm = checksum_algorithm
+        self.max_workers = max(1, max_workers)
+        self.ydl_overrides: Dict[str, Any] = dict(ydl_overrides or {})
+        self.archive_file = archive_file
+        self.status_callback: Optional[Callable[[DownloadJob, str], None]] = None
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._active: Dict[str, VideoDownloader] = {}
+        self._active_lock = threading.Lock()
+        self.queue.add_listener(self._on_queue_event)
+        # Só os jobs que uma thread está baixando têm o lease renovado
+        self.queue.set_lease_guard(self._is_active)
+
+    def set_callbacks(self, status_callback: Callable[[DownloadJob, str], None] = None) -> None:
+        """Define callback de status (recebe o job e a mensagem)"""
+        self.status_callback = status_callback
+
+    def start(self) -> None:
+        """Inicia as threads de trabalho"""
+        self._stop_event.clear()
+        for index in range(self.max_workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"download-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait: bool = True) -> None:
+        """Para de retirar novos jobs da fila"""
+        self._stop_event.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads.clear()
+
+    def _worker_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job = self.queue.get(timeout=0.5)
+                if job is not None:
+                    self.run_job(job)
+            except Exception as e:
+                # Ex.: banco ocupado ao concluir. O job sai de `_active`, o lease
+                # deixa de ser renovado e ele volta para a fila ao expirar
+                print(f"Erro no worker da fila: {e}")
+                self._stop_event.wait(1.0)
+
+    def _is_active(self, job_id: str) -> bool:
+        with self._active_lock:
+            return job_id in self._active
+
+    def _on_queue_event(self, event: str, data: Dict[str, Any]) -> None:
+        # 'lease_lost': outro worker assumiu o job (fila compartilhada)
+        if event not in ('cancelled', 'lease_lost'):
+            return
+        with self._active_lock:
+            downloader = self._active.get(data['job_id'])
+        if downloader is not None:
+            downloader.cancel()
+
+    def job_ydl_overrides(self, job: DownloadJob) -> Dict[str, Any]:
+        """Opções do yt-dlp para um job
+
+        O arquivo de downloads só vale para os jobs das inscrições: o
+        yt-dlp pula qualquer vídeo já registrado, o que ignoraria um pedido
+        explícito do mesmo vídeo em outro formato ou com outros trechos.
+        """
+        if not (self.archive_file and job.skip_archived):
+            return self.ydl_overrides
+        return {**self.ydl_overrides, 'download_archive': self.archive_file}
+
+    def create_downloader(self, job: DownloadJob) -> VideoDownloader:
+        """Cria o downloader de um job (os benchmarks trocam por um simulado)"""
+        return VideoDownloader(self.job_ydl_overrides(job),
+                               checksum_algorithm=self.checksum_algorithm)
+
+    def run_job(self, job: DownloadJob) -> None:
+        """Baixa um único job e registra o resultado na fila"""
+        downloader: Optional[VideoDownloader] = None
+        last_percent = [-1]
+
+        def on_progress(percent: int) -> None:
+            # O hook do yt-dlp dispara várias vezes por segundo; publica só mudanças
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.queue.publish('progress', job, percent=percent)
+
+        def on_status(message: str) -> None:
+            self.queue.publish('status', job, message=message)
+            if self.status_callback:
+                self.status_callback(job, message)
+
+        try:
+            # Dentro do try: um erro de configuração falha o job em vez de
+            # matar a thread com o job em andamento
+            downloader = self.create_downloader(job)
+            downloader.set_callbacks(progress_callback=on_progress, status_callback=on_status)
+            with self._active_lock:
+                self._active[job.job_id] = downloader
+            downloader.download(
+                job.url,
+                job.destination_folder,
+                job.download_format,
+                job.audio_quality,
+                job.video_quality,
+                [(start, float('inf') if end is None else end)
+                 for start, end in job.sections] or None
+            )
+            error = ''
+        except DownloadError as e:
+            error = str(e)
+        except Exception as e:
+            error = f"Erro inesperado: {str(e)}"
+        finally:
+            with self._active_lock:
+                self._active.pop(job.job_id, None)
+            # O YoutubeDL e os extratores formam ciclos de referência; libera
+            # o estado do job agora em vez de esperar o coletor acumular lixo
+            downloader = None
+            gc.collect()
+        # Fora do try: se a conclusão falhar (ex.: banco ocupado), o erro não
+        # pode virar uma segunda conclusão marcando o download como falha
+        self.queue.complete(job.job_id, error=error)
@@ -0,0 +1,265 @@
+import re
+import time
+import heapq
+import random
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from collections import deque
+from typing import Optional, Dict, Any, Callable, List, Tuple, Iterator
+import yt_dlp
+
+from core.archive import DownloadArchive
+from core.jobs import BaseJobQueue, DownloadJob
+
+
+@dataclass
+class Subscription:
+    """Canal ou playlist acompanhado periodicamente"""
+    url: str
+    preset: str = ''
+    destination_folder: str = ''
+    interval_minutes: float = 60.0
+    max_entries: int = 50         # Limite de itens verificados por consulta
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Subscription':
+        names = cls.__dataclass_fields__.keys()
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+
+# Recebe a inscrição e a entrada (id, url, title) e devolve o job a enfileirar
+JobFactory = Callable[[Subscription, Dict[str, Any]], DownloadJob]
+
+
+class ChannelWatcher:
+    """Consulta canais/playlists periodicamente e enfileira os vídeos novos
+
+    Cada consulta usa `extract_flat`, que só lista as entradas sem extrair
+    os vídeos. Abas de canal vêm das mais recentes para as mais antigas:
+    a consulta para no primeiro ID já conhecido, então uma inscrição sem
+    novidades custa apenas a primeira página. Playlists costumam vir das
+    mais antigas para as mais novas (itens novos no fim): a listagem é
+    percorrida inteira, pulando os IDs conhecidos.
+
+    IDs conhecidos são os já baixados (`archive`), os já na fila e os
+    marcados como vistos (`seen`) ao cadastrar a inscrição, para que a
+    primeira consulta não baixe o catálogo antigo.
+    """
+
+    CHANNEL_ROOT = re.compile(
+        r'^(https?://)?(www\.|m\.)?youtube\.com/(@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)/?$'
+    )
+    # Abas de canal ordenadas por data, da mais recente para a mais antiga
+    CHANNEL_TAB = re.compile(
+        r'^(https?://)?(www\.|m\.)?youtube\.com/(@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)'
+        r'/(videos|shorts|streams)/?$'
+    )
+    # Playlist de uploads do canal (list=UU...), também da mais recente para trás
+    UPLOADS_PLAYLIST = re.compile(r'[?&]list=UU[\w-]+(&|$)')
+
+    def __init__(self, queue: BaseJobQueue, archive: DownloadArchive,
+                 job_factory: JobFactory, max_concurrent_polls: int = 4,
+                 jitter: float = 0.2, seen: Optional[DownloadArchive] = None):
+        self.queue = queue
+        self.archive = archive
+        self.seen = seen
+        self.job_factory = job_factory
+        self.max_concurrent_polls = max(1, max_concurrent_polls)
+        self.jitter = min(max(jitter, 0.0), 0.9)
+        self.status_callback: Optional[Callable[[str], None]] = None
+        self._subscriptions: List[Subscription] = []
+        self._schedule: List[Tuple[float, int, int]] = []  # (quando, seq, índice)
+        self._seq = itertools.count()
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def set_callbacks(self, status_callback: Callable[[str], None] = None) -> None:
+        """Define callback de status"""
+        self.status_callback = status_callback
+
+    def add_subscription(self, subscription: Subscription) -> None:
+        """Adiciona uma inscrição; a primeira consulta é espalhada no tempo"""
+        with self._lock:
+            self._subscriptions.append(subscription)
+            index = len(self._subscriptions) - 1
+            first_poll = time.monotonic() + random.uniform(
+                0, self._interval_seconds(subscription) * self.jitter
+            )
+            heapq.heappush(self._schedule, (first_poll, next(self._seq), index))
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Inicia o agendador em segundo plano"""
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_polls, thread_name_prefix='watch-poll'
+        )
+        self._thread = threading.Thread(target=self._scheduler_loop,
+                                        name='channel-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Para o agendador e aguarda as consultas em andamento"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _scheduler_loop(self) -> None:
+        # O semáforo impede que consultas atrasadas se acumulem no executor
+        slots = threading.Semaphore(self.max_concurrent_polls)
+
+        while not self._stop_event.is_set():
+            with self._lock:
+                next_due = self._schedule[0][0] if self._schedule else None
+
+            now = time.monotonic()
+            if next_due is None or next_due > now:
+                timeout = None if next_due is None else next_due - now
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                continue
+
+            if not slots.acquire(timeout=1.0):
+                continue
+
+            with self._lock:
+                _, _, index = heapq.heappop(self._schedule)
+                subscription = self._subscriptions[index]
+
+            def run(subscription=subscription, index=index):
+                try:
+                    self.poll(subscription)
+                finally:
+                    slots.release()
+                    self._reschedule(index)
+
+            self._executor.submit(run)
+
+    def _reschedule(self, index: int) -> None:
+        with self._lock:
+            subscription = self._subscriptions[index]
+            interval = self._interval_seconds(subscription)
+            delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            heapq.heappush(self._schedule,
+                           (time.monotonic() + delay, next(self._seq), index))
+        self._wakeup.set()
+
+    def _interval_seconds(self, subscription: Subscription) -> float:
+        return max(60.0, subscription.interval_minutes * 60)
+
+    def poll(self, subscription: Subscription) -> List[DownloadJob]:
+        """Consulta a inscrição uma vez e enfileira somente os vídeos novos"""
+        try:
+            new_entries = self.fetch_new_entries(subscription)
+        except Exception as e:
+            self._notify(f"Erro ao consultar {subscription.url}: {str(e)}")
+            return []
+
+        queued = []
+        for entry in new_entries:
+            job = self.job_factory(subscription, entry)
+            if self.queue.put(job):
+                queued.append(job)
+
+        if queued:
+            self._notify(f"{len(queued)} vídeo(s) novo(s) em {subscription.url}")
+        return queued
+
+    def fetch_new_entries(self, subscription: Subscription) -> List[Dict[str, Any]]:
+        """Lista as entradas novas, na ordem de publicação
+
+        Devolve no máximo `max_entries` entradas (as mais recentes).
+        """
+        url = self.normalize_feed_url(subscription.url)
+        newest_first = self.is_newest_first(url)
+        new_entries = deque(maxlen=subscription.max_entries)
+
+        entries = self._iter_entries(url)
+        if newest_first:
+            entries = itertools.islice(entries, subscription.max_entries)
+        for entry in entries:
+            if self.is_known(entry['id']):
+                if newest_first:
+                    break  # Daqui para trás tudo já foi visto
+                continue
+            new_entries.append(entry)
+
+        new_entries = list(new_entries)
+        if newest_first:
+            new_entries.reverse()
+        return new_entries
+
+    def seed(self, subscription: Subscription) -> int:
+        """Marca a listagem atual como vista, sem enfileirar nada
+
+        Usado ao cadastrar a inscrição; devolve quantos IDs foram marcados.
+        """
+        if self.seen is None:
+            return 0
+        url = self.normalize_feed_url(subscription.url)
+        entries = self._iter_entries(url)
+        if self.is_newest_first(url):
+            entries = itertools.islice(entries, subscription.max_entries)
+        return self.seen.add_many(entry['id'] for entry in entries)
+
+    def is_known(self, video_id: str) -> bool:
+        if self.archive.contains(video_id) or self.queue.has_video(video_id):
+            return True
+        return self.seen is not None and self.seen.contains(video_id)
+
+    def is_newest_first(self, url: str) -> bool:
+        return bool(self.CHANNEL_TAB.match(url) or self.UPLOADS_PLAYLIST.search(url))
+
+    def _iter_entries(self, url: str) -> Iterator[Dict[str, Any]]:
+        """Gera (id, url, title) das entradas, página a página"""
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+            'skip_download': True,
+            'socket_timeout': 30,
+            'retries': 3,
+        }
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+            # Alguns extratores redirecionam para a aba/playlist real
+            for _ in range(3):
+                if info.get('_type') not in ('url', 'url_transparent'):
+                    break
+                info = ydl.extract_info(info['url'], download=False, process=False)
+
+            # Com process=False as entradas são geradas sob demanda, página a página
+            for entry in info.get('entries') or []:
+                if not entry or not entry.get('id'):
+                    continue
+                video_id = entry['id']
+                yield {
+                    'id': video_id,
+                    'url': entry.get('url') or f"https://www.youtube.com/watch?v={video_id}",
+                    'title': entry.get('title') or '',
+                }
+
+    def normalize_feed_url(self, url: str) -> str:
+        """Aponta a raiz de um canal para a aba de vídeos (ordenada por data)"""
+        if self.CHANNEL_ROOT.match(url):
+            return url.rstrip('/') + '/videos'
+        return url
+
+    def _notify(self, message: str) -> None:
+        if self.status_callback:
+            self.status_callback(message)
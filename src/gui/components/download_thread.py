@@ -1,3 +1,4 @@
+from typing import Optional, Dict, Any, List, Tuple
 from PySide6.QtCore import QThread, Signal, QTimer
 from core.downloader import VideoDownloader, DownloadError
 
@@ -12,14 +13,20 @@ class DownloadThread(QThread):
     
     def __init__(self, url: str, destination_folder: str, 
                  download_format: str, audio_quality: str, 
-                 video_quality: str):
+                 video_quality: str, 
+                 ydl_overrides: Optional[Dict[str, Any]] = None,
+                 sections: Optional[List[Tuple[float, float]]] = None,
+                 extraction_pool=None,
+                 checksum_algorithm: str = ''):
         super().__init__()
         self.url = url
         self.destination_folder = destination_folder
         self.download_format = download_format
         self.audio_quality = audio_quality
         self.video_quality = video_quality
-        self.downloader = VideoDownloader()
+        self.sections = sections
+        self.downloader = VideoDownloader(ydl_overrides, extraction_pool,
+                                          checksum_algorithm)
         self._is_cancelled = False
         
         # Timer para timeout de operações longas
@@ -97,7 +104,8 @@ class DownloadThread(QThread):
                 self.destination_folder,
                 self.download_format,
                 self.audio_quality,
-                self.video_quality
+                self.video_quality,
+                self.sections
             )
             
             self.timeout_timer.stop()
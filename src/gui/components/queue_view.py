@@ -0,0 +1,109 @@
+from typing import Dict, List
+from PySide6.QtWidgets import QListWidget, QListWidgetItem, QAbstractItemView
+from PySide6.QtCore import Qt, QTimer, QSize, QPoint
+from PySide6.QtGui import QPixmap
+
+from core.jobs import DownloadJob, PENDING, RUNNING, DONE, FAILED, CANCELLED
+from gui.components.thumbnail_loader import ThumbnailLoader
+
+STATUS_LABELS = {
+    PENDING: "Na fila",
+    RUNNING: "Baixando",
+    DONE: "Concluído",
+    FAILED: "Falhou",
+    CANCELLED: "Cancelado",
+}
+
+
+class QueueView(QListWidget):
+    """Lista dos jobs da fila com miniaturas carregadas sob demanda
+
+    Só as linhas visíveis pedem miniatura. Ao rolar, os pedidos das linhas
+    que saíram da tela e ainda não começaram são cancelados.
+    """
+
+    VIDEO_ID_ROLE = Qt.UserRole + 1
+    SCROLL_DEBOUNCE_MS = 100
+
+    def __init__(self, thumbnail_loader: ThumbnailLoader, parent=None):
+        super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self._job_ids: List[str] = []
+        self._items_by_video: Dict[str, List[QListWidgetItem]] = {}
+
+        self.setIconSize(QSize(*thumbnail_loader.size))
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        self._visible_timer = QTimer(self)
+        self._visible_timer.setSingleShot(True)
+        self._visible_timer.timeout.connect(self.load_visible_thumbnails)
+        self.verticalScrollBar().valueChanged.connect(self.schedule_visible_load)
+        thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+    def set_jobs(self, jobs: List[DownloadJob]) -> None:
+        """Atualiza a lista; só recria os itens se os jobs mudaram"""
+        job_ids = [job.job_id for job in jobs]
+        if job_ids != self._job_ids:
+            self._rebuild(jobs)
+        else:
+            for row, job in enumerate(jobs):
+                self.item(row).setText(self._item_text(job))
+        self.schedule_visible_load()
+
+    def schedule_visible_load(self) -> None:
+        self._visible_timer.start(self.SCROLL_DEBOUNCE_MS)
+
+    def load_visible_thumbnails(self) -> None:
+        """Pede as miniaturas só das linhas que estão na tela"""
+        if self.count() == 0:
+            return
+        viewport = self.viewport().rect()
+        first = self.indexAt(QPoint(1, 1)).row()
+        last = self.indexAt(QPoint(1, viewport.height() - 1)).row()
+        first = max(first, 0)
+        last = self.count() - 1 if last < 0 else last
+
+        visible = []
+        for row in range(first, last + 1):
+            item = self.item(row)
+            video_id = item.data(self.VIDEO_ID_ROLE)
+            if not video_id:
+                continue
+            visible.append(video_id)
+            pixmap = self.thumbnail_loader.request(video_id)
+            if pixmap is not None:
+                item.setIcon(pixmap)
+        self.thumbnail_loader.retain(visible)
+
+    def on_thumbnail_ready(self, video_id: str, pixmap: QPixmap) -> None:
+        for item in self._items_by_video.get(video_id, []):
+            item.setIcon(pixmap)
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self.schedule_visible_load()
+
+    def _rebuild(self, jobs: List[DownloadJob]) -> None:
+        scroll = self.verticalScrollBar().value()
+        self.clear()
+        self._items_by_video.clear()
+        for job in jobs:
+            item = QListWidgetItem(self._item_text(job))
+            item.setData(self.VIDEO_ID_ROLE, job.video_id)
+            # Miniaturas já na memória aparecem na hora, sem novo pedido
+            pixmap = self.thumbnail_loader.get(job.video_id) if job.video_id else None
+            if pixmap is not None:
+                item.setIcon(pixmap)
+            if job.video_id:
+                self._items_by_video.setdefault(job.video_id, []).append(item)
+            self.addItem(item)
+        self._job_ids = [job.job_id for job in jobs]
+        self.verticalScrollBar().setValue(scroll)
+
+    def _item_text(self, job: DownloadJob) -> str:
+        status = STATUS_LABELS.get(job.status, job.status)
+        if job.error:
+            status = f"{status}: {job.error}"
+        return f"{job.title or job.url}\n{status}"
@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import tempfile
+import threading
+import urllib.request
+from io import BytesIO
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Iterable, Tuple
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+try:
+    from PIL import Image
+except ImportError:  # Dependência opcional: sem Pillow, sem miniaturas
+    Image = None
+
+VIDEO_ID_PATTERN = re.compile(r'[\w-]+')
+
+
+class ThumbnailLoader(QObject):
+    """Carrega as miniaturas dos vídeos sem travar a interface
+
+    O download, a decodificação e a redução (Pillow) rodam num pool de
+    threads com poucos workers, o que limita as conexões simultâneas.
+    O worker entrega um QImage; o QPixmap só é criado na thread da
+    interface, como o Qt exige.
+
+    O cache tem dois níveis, ambos por ID de vídeo: um LRU de QPixmap na
+    memória e os JPEGs já reduzidos em disco (`<pasta>/<id>.jpg`). O disco
+    guarda até `max_disk_items` arquivos; os menos usados (mtime, renovado
+    a cada leitura) são apagados. Uma miniatura que falhou (rede fora do
+    ar, vídeo removido) só é tentada de novo após `RETRY_DELAY` segundos.
+    """
+
+    thumbnail_ready = Signal(str, QPixmap)  # video_id, miniatura
+    _decoded = Signal(str, QImage)          # Entrega do worker para a thread da interface
+
+    FETCH_TIMEOUT = 10
+    RETRY_DELAY = 300  # Segundos até tentar de novo uma miniatura que falhou
+    PRUNE_EVERY = 100  # Gravações em disco entre as limpezas do cache
+
+    def __init__(self, cache_dir: str, size: Tuple[int, int] = (160, 90),
+                 max_workers: int = 4, memory_items: int = 256,
+                 max_disk_items: int = 2000, parent=None):
+        super().__init__(parent)
+        self.cache_dir = Path(cache_dir)
+        self.size = size
+        self.memory_items = memory_items
+        self.max_disk_items = max_disk_items
+        self._memory: 'OrderedDict[str, QPixmap]' = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._failed: Dict[str, float] = {}  # video_id -> momento da falha
+        self._saves = 0  # Gravações desde a última limpeza (a primeira já limpa)
+        self._prune_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='thumbnail')
+        self._decoded.connect(self._on_decoded)
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    @staticmethod
+    def thumbnail_url(video_id: str, url: Optional[str] = None) -> str:
+        """URL informada pelo yt-dlp ou a miniatura média padrão do YouTube"""
+        return url or f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"
+
+    def get(self, video_id: str) -> Optional[QPixmap]:
+        """Miniatura que já está na memória (não dispara carregamento)"""
+        pixmap = self._memory.get(video_id)
+        if pixmap is not None:
+            self._memory.move_to_end(video_id)
+        return pixmap
+
+    def request(self, video_id: Optional[str], url: Optional[str] = None) -> Optional[QPixmap]:
+        """Devolve a miniatura se estiver na memória; senão agenda o carregamento
+
+        Quando ela fica pronta, `thumbnail_ready` é emitido.
+        """
+        if not video_id or not VIDEO_ID_PATTERN.fullmatch(video_id):
+            return None
+        pixmap = self.get(video_id)
+        if pixmap is not None or not self.available:
+            return pixmap
+        if video_id in self._pending:
+            return None
+        failed_at = self._failed.get(video_id)
+        if failed_at is not None:
+            if time.monotonic() - failed_at < self.RETRY_DELAY:
+                return None
+            del self._failed[video_id]
+        self._pending[video_id] = self._executor.submit(
+            self._load, video_id, self.thumbnail_url(video_id, url)
+        )
+        return None
+
+    def retain(self, video_ids: Iterable[str]) -> None:
+        """Cancela os carregamentos ainda na fila que não estão nesta lista
+
+        Usado pela lista ao rolar: linhas que saíram da tela não gastam
+        conexões.
+        """
+        keep = set(video_ids)
+        for video_id, future in list(self._pending.items()):
+            if video_id not in keep and future.cancel():
+                del self._pending[video_id]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, video_id: str, url: str) -> None:
+        """Roda no pool: disco ou rede -> Pillow -> QImage"""
+        try:
+            path = self.cache_dir / f"{video_id}.jpg"
+            if path.exists():
+                image = Image.open(path)
+                image.load()
+                os.utime(path)  # Marca como usada para a limpeza do cache
+            else:
+                with urllib.request.urlopen(url, timeout=self.FETCH_TIMEOUT) as response:
+                    image = Image.open(BytesIO(response.read()))
+                    image.load()
+                image = image.convert('RGB')
+                image.thumbnail(self.size, Image.LANCZOS)
+                self._save(path, image)
+
+            image = image.convert('RGB')
+            data = image.tobytes('raw', 'RGB')
+            qimage = QImage(data, image.width, image.height, image.width * 3,
+                            QImage.Format_RGB888).copy()  # copy(): buffer próprio
+            self._decoded.emit(video_id, qimage)
+        except Exception as e:
+            print(f"Erro ao carregar miniatura de {video_id}: {e}")
+            self._decoded.emit(video_id, QImage())
+
+    def _save(self, path: Path, image) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.thumb-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'JPEG', quality=85)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        self._saves += 1
+        if self._saves == 1 or self._saves > self.PRUNE_EVERY:
+            self._saves = 1
+            self._prune()
+
+    def _prune(self) -> None:
+        """Apaga as miniaturas menos usadas além de `max_disk_items`"""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # Outro worker já está limpando
+        try:
+            entries = []
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.jpg'):
+                        try:
+                            entries.append((entry.stat().st_mtime, entry.path))
+                        except OSError:
+                            continue
+            if len(entries) <= self.max_disk_items:
+                return
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_disk_items]:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        finally:
+            self._prune_lock.release()
+
+    def _on_decoded(self, video_id: str, image: QImage) -> None:
+        """Thread da interface: cria o QPixmap e atualiza o LRU"""
+        self._pending.pop(video_id, None)
+        if image.isNull():
+            self._failed[video_id] = time.monotonic()
+            return
+
+        pixmap = QPixmap.fromImage(image)
+        self._memory[video_id] = pixmap
+        self._memory.move_to_end(video_id)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+        self.thumbnail_ready.emit(video_id, pixmap)
@@ -1,23 +1,138 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                                QLineEdit, QPushButton, QFileDialog, QComboBox, 
                                QProgressBar, QMessageBox, QGridLayout, QTextEdit,
-                               QGroupBox, QSplitter)
-from PySide6.QtCore import Qt, QTimer
+                               QGroupBox, QSplitter, QInputDialog)
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QIcon, QPixmap
 from pathlib import Path
+import threading
 
 from config.settings import ConfigManager, APP_CONFIG
+from core.downloader import (VideoDownloader, DownloadError, parse_sections, 
+                             format_timestamp)
+from core.extraction import ExtractionPool
+from core.player_cache import PlayerCache
+from core.job_store import SQLiteJobQueue
+from core.jobs import PENDING, RUNNING, ACTIVE_STATES
 from gui.components.download_thread import DownloadThread
+from gui.components.thumbnail_loader import ThumbnailLoader
+from gui.components.queue_view import QueueView
 
 class MainWindow(QWidget):
     """Janela principal da aplicação"""
     
+    QUEUE_VIEW_LIMIT = 500  # Linhas da fila carregadas na lista
+    
+    _queue_loaded = Signal(list)  # Entrega da thread de leitura da fila para a interface
+    
     def __init__(self):
         super().__init__()
         self.config_manager = ConfigManager()
         self.download_thread = None
+        self.extraction_pool = None
+        self.player_cache = None
+        self.job_queue = None
+        self._queue_loader = None
+        self.info_video_id = None
+        self.suggested_sections = ''
+        self.thumbnail_loader = ThumbnailLoader(str(self.config_manager.thumbnails_dir))
         self.init_ui()
         self.load_saved_config()
+        self.start_player_cache()
+        self.start_extraction_pool()
+        self.start_queue_refresh()
+        self.show_config_warnings()
+    
+    def show_config_warnings(self) -> None:
+        """Avisa sobre opções do config.json trocadas pelo padrão ao carregar"""
+        if self.config_manager.warnings:
+            QMessageBox.warning(self, "Configuração",
+                                "\n".join(self.config_manager.warnings))
+    
+    def start_player_cache(self) -> None:
+        """Prepara o cache compartilhado do player e o aquece em segundo plano"""
+        if not self.config_manager.settings.engine.cache_enabled:
+            return
+        
+        self.player_cache = PlayerCache(str(self.config_manager.cache_dir))
+        self.player_cache.warm_up_async()
+    
+    def build_ydl_overrides(self) -> dict:
+        """Opções extras do yt-dlp (motores e cache compartilhado)"""
+        overrides = self.config_manager.settings.engine.to_ydl_options()
+        if self.player_cache is not None:
+            overrides.update(self.player_cache.ydl_options())
+        return overrides
+    
+    def start_extraction_pool(self) -> None:
+        """Sobe os processos de extração em segundo plano"""
+        processes = self.config_manager.settings.engine.extraction_processes
+        if processes <= 0:
+            return
+        
+        self.extraction_pool = ExtractionPool(processes, self.build_ydl_overrides())
+        threading.Thread(target=self.warm_up_extraction_pool, daemon=True).start()
+    
+    def warm_up_extraction_pool(self) -> None:
+        """Roda numa thread auxiliar: sobe os processos de extração"""
+        try:
+            self.extraction_pool.warm_up()
+        except Exception as e:
+            # Não é fatal: o pool é recriado na primeira extração
+            print(f"Erro ao iniciar os processos de extração: {e}")
+    
+    def start_queue_refresh(self) -> None:
+        """Acompanha a fila persistida (alimentada pela linha de comando/API)"""
+        self.queue_timer = QTimer(self)
+        self.queue_timer.timeout.connect(self.refresh_queue)
+        self.queue_timer.start(3000)
+        self.refresh_queue()
+    
+    def refresh_queue(self) -> None:
+        """Recarrega os jobs da fila numa thread auxiliar
+
+        As consultas ao SQLite (que pode estar ocupado pelos workers) e a
+        leitura do JSON dos jobs não rodam na thread da interface; o
+        resultado chega por `_queue_loaded`. A seção só aparece se a fila
+        existir.
+        """
+        if self._queue_loader is not None:
+            return  # Leitura anterior ainda em andamento
+        if self.job_queue is None and not self.config_manager.queue_file.exists():
+            return
+        self._queue_loader = threading.Thread(target=self.load_queue_jobs,
+                                              name='queue-refresh', daemon=True)
+        self._queue_loader.start()
+    
+    def load_queue_jobs(self) -> None:
+        """Roda na thread auxiliar: consulta a fila e entrega a lista"""
+        jobs = None
+        try:
+            if self.job_queue is None:
+                self.job_queue = SQLiteJobQueue(str(self.config_manager.queue_file),
+                                                read_only=True)
+            
+            # Em andamento e pendentes primeiro; o restante da lista são os
+            # finalizados mais recentes
+            limit = self.QUEUE_VIEW_LIMIT
+            jobs = self.job_queue.list_jobs(RUNNING, limit)
+            jobs += self.job_queue.list_jobs(PENDING, limit - len(jobs))
+            for job in self.job_queue.list_jobs(limit=limit, newest_first=True):
+                if len(jobs) >= limit:
+                    break
+                if job.status not in ACTIVE_STATES:
+                    jobs.append(job)
+        except Exception as e:
+            print(f"Erro ao carregar a fila: {e}")
+        self._queue_loaded.emit(jobs)
+    
+    def on_queue_loaded(self, jobs) -> None:
+        """Thread da interface: atualiza a lista com os jobs lidos"""
+        self._queue_loader = None
+        if jobs is None:
+            return
+        self.queue_group.setVisible(True)
+        self.queue_view.set_jobs(jobs)
     
     def init_ui(self) -> None:
         """Inicializa a interface do usuário"""
@@ -64,6 +179,10 @@ class MainWindow(QWidget):
         info_group = self.create_info_section()
         main_layout.addWidget(info_group)
         
+        # Fila persistida
+        self.queue_group = self.create_queue_section()
+        main_layout.addWidget(self.queue_group)
+        
         self.setLayout(main_layout)
     
     def create_url_section(self) -> QGroupBox:
@@ -84,34 +203,49 @@ class MainWindow(QWidget):
         group = QGroupBox("Configurações")
         layout = QGridLayout()
         
+        # Perfil
+        layout.addWidget(QLabel("Perfil:"), 0, 0)
+        self.preset_var = QComboBox()
+        layout.addWidget(self.preset_var, 0, 1)
+        
+        save_preset_button = QPushButton("💾 Salvar")
+        save_preset_button.clicked.connect(self.save_current_preset)
+        layout.addWidget(save_preset_button, 0, 2)
+        
         # Pasta de destino
-        layout.addWidget(QLabel("Pasta de Destino:"), 0, 0)
+        layout.addWidget(QLabel("Pasta de Destino:"), 1, 0)
         self.destination_folder_var = QLineEdit()
-        layout.addWidget(self.destination_folder_var, 0, 1)
+        layout.addWidget(self.destination_folder_var, 1, 1)
         
         select_button = QPushButton("📁 Selecionar")
         select_button.clicked.connect(self.select_destination_folder)
-        layout.addWidget(select_button, 0, 2)
+        layout.addWidget(select_button, 1, 2)
         
         # Formato
-        layout.addWidget(QLabel("Formato:"), 1, 0)
+        layout.addWidget(QLabel("Formato:"), 2, 0)
         self.format_var = QComboBox()
         self.format_var.addItems(APP_CONFIG['supported_formats'])
-        layout.addWidget(self.format_var, 1, 1, 1, 2)
+        layout.addWidget(self.format_var, 2, 1, 1, 2)
         
         # Qualidade do áudio
         self.audio_quality_label = QLabel("Qualidade do Áudio:")
-        layout.addWidget(self.audio_quality_label, 2, 0)
+        layout.addWidget(self.audio_quality_label, 3, 0)
         self.audio_quality_var = QComboBox()
         self.audio_quality_var.addItems(APP_CONFIG['audio_qualities'])
-        layout.addWidget(self.audio_quality_var, 2, 1, 1, 2)
+        layout.addWidget(self.audio_quality_var, 3, 1, 1, 2)
         
         # Qualidade do vídeo
         self.video_quality_label = QLabel("Qualidade do Vídeo:")
-        layout.addWidget(self.video_quality_label, 3, 0)
+        layout.addWidget(self.video_quality_label, 4, 0)
         self.video_quality_var = QComboBox()
         self.video_quality_var.addItems(APP_CONFIG['video_qualities'])
-        layout.addWidget(self.video_quality_var, 3, 1, 1, 2)
+        layout.addWidget(self.video_quality_var, 4, 1, 1, 2)
+        
+        # Trechos (modo recorte)
+        layout.addWidget(QLabel("Trechos:"), 5, 0)
+        self.sections_var = QLineEdit()
+        self.sections_var.setPlaceholderText("ex.: 1:00-2:30, 10:00-11:15 (vazio = vídeo inteiro)")
+        layout.addWidget(self.sections_var, 5, 1, 1, 2)
         
         group.setLayout(layout)
         return group
@@ -149,7 +283,12 @@ class MainWindow(QWidget):
     def create_info_section(self) -> QGroupBox:
         """Cria seção de informações do vídeo"""
         group = QGroupBox("Informações do Vídeo")
-        layout = QVBoxLayout()
+        layout = QHBoxLayout()
+        
+        self.video_thumbnail = QLabel()
+        self.video_thumbnail.setFixedSize(*self.thumbnail_loader.size)
+        self.video_thumbnail.setVisible(False)
+        layout.addWidget(self.video_thumbnail)
         
         self.video_info_text = QTextEdit()
         self.video_info_text.setMaximumHeight(100)
@@ -160,11 +299,28 @@ class MainWindow(QWidget):
         group.setLayout(layout)
         return group
     
+    def create_queue_section(self) -> QGroupBox:
+        """Cria seção da fila de downloads"""
+        group = QGroupBox("Fila")
+        layout = QVBoxLayout()
+        
+        self.queue_view = QueueView(self.thumbnail_loader)
+        self.queue_view.setMinimumHeight(150)
+        layout.addWidget(self.queue_view)
+        
+        group.setLayout(layout)
+        group.setVisible(False)
+        return group
+    
     def connect_signals(self) -> None:
         """Conecta sinais dos componentes"""
         self.format_var.currentTextChanged.connect(self.on_format_change)
+        self.url_entry.textChanged.connect(self.on_url_change)
+        self.preset_var.activated.connect(self.on_preset_selected)
         self.download_button.clicked.connect(self.start_download)
         self.cancel_button.clicked.connect(self.cancel_download)
+        self.thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self._queue_loaded.connect(self.on_queue_loaded)
         
         # Auto-completar pasta de destino
         if not self.destination_folder_var.text():
@@ -278,16 +434,67 @@ class MainWindow(QWidget):
     
     def load_saved_config(self) -> None:
         """Carrega configurações salvas"""
-        destination, format_type, audio_quality, video_quality = self.config_manager.load_config()
+        settings = self.config_manager.settings
         
-        if destination:
-            self.destination_folder_var.setText(destination)
+        if settings.destination_folder:
+            self.destination_folder_var.setText(settings.destination_folder)
         
+        self.refresh_presets()
+        self.apply_download_options(settings.download_format,
+                                    settings.audio_quality,
+                                    settings.video_quality)
+    
+    def refresh_presets(self) -> None:
+        """Recarrega a lista de perfis disponíveis"""
+        settings = self.config_manager.settings
+        self.preset_var.clear()
+        self.preset_var.addItem("Personalizado")
+        self.preset_var.addItems(self.config_manager.list_presets())
+        if settings.active_preset:
+            self.preset_var.setCurrentText(settings.active_preset)
+    
+    def apply_download_options(self, format_type: str, audio_quality: str, 
+                               video_quality: str) -> None:
+        """Preenche os campos de formato e qualidade"""
         self.format_var.setCurrentText(format_type)
         self.audio_quality_var.setCurrentText(audio_quality)
         self.video_quality_var.setCurrentText(video_quality)
         self.on_format_change(format_type)
     
+    def on_preset_selected(self, index: int) -> None:
+        """Aplica o perfil escolhido"""
+        if index <= 0:
+            self.config_manager.update(active_preset='')
+            return
+        
+        name = self.preset_var.currentText()
+        settings = self.config_manager.settings
+        settings.apply_preset(name)
+        self.config_manager.save_settings()
+        self.apply_download_options(settings.download_format,
+                                    settings.audio_quality,
+                                    settings.video_quality)
+    
+    def save_current_preset(self) -> None:
+        """Salva as opções atuais como um novo perfil"""
+        name, ok = QInputDialog.getText(self, "Salvar Perfil", "Nome do perfil:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        
+        self.store_download_options()
+        self.config_manager.save_preset(name)
+        self.refresh_presets()
+    
+    def store_download_options(self) -> None:
+        """Atualiza as configurações com os valores da interface"""
+        self.config_manager.update(
+            destination_folder=self.destination_folder_var.text().strip(),
+            download_format=self.format_var.currentText(),
+            audio_quality=self.audio_quality_var.currentText(),
+            video_quality=self.video_quality_var.currentText()
+        )
+    
     def on_format_change(self, format_type: str) -> None:
         """Atualiza interface baseado no formato selecionado"""
         is_audio = format_type == 'mp3'
@@ -297,6 +504,20 @@ class MainWindow(QWidget):
         self.video_quality_label.setVisible(not is_audio)
         self.video_quality_var.setVisible(not is_audio)
     
+    def on_url_change(self, url: str) -> None:
+        """Sugere um trecho a partir do parâmetro `t` da URL
+        
+        Um trecho digitado pelo usuário é mantido; um sugerido para a URL
+        anterior é trocado (ou apagado), para não recortar outro vídeo.
+        """
+        current = self.sections_var.text().strip()
+        if current and current != self.suggested_sections:
+            return
+        
+        timestamp = VideoDownloader().get_url_timestamp(url.strip())
+        self.suggested_sections = f"{format_timestamp(timestamp)}-" if timestamp else ''
+        self.sections_var.setText(self.suggested_sections)
+    
     def select_destination_folder(self) -> None:
         """Abre diálogo para seleção de pasta"""
         current_folder = self.destination_folder_var.text()
@@ -318,13 +539,31 @@ class MainWindow(QWidget):
             QMessageBox.warning(self, "Aviso", "Por favor, escolha a pasta de destino.")
             return
         
-        # Salva configurações
-        self.config_manager.save_config(
-            destination,
-            self.format_var.currentText(),
-            self.audio_quality_var.currentText(),
-            self.video_quality_var.currentText()
-        )
+        try:
+            sections = parse_sections(self.sections_var.text())
+        except DownloadError as e:
+            QMessageBox.warning(self, "Aviso", str(e))
+            return
+        
+        # Salva configurações (a gravação em disco é agrupada)
+        self.store_download_options()
+        
+        # Cria a thread antes de travar os botões: um erro aqui não pode
+        # deixar o botão de download desabilitado
+        try:
+            self.download_thread = DownloadThread(
+                url, destination,
+                self.format_var.currentText(),
+                self.audio_quality_var.currentText(),
+                self.video_quality_var.currentText(),
+                self.build_ydl_overrides(),
+                sections or None,
+                self.extraction_pool,
+                self.config_manager.settings.engine.checksum_algorithm
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Não foi possível iniciar o download: {e}")
+            return
         
         # Configura UI para download
         self.download_button.setEnabled(False)
@@ -332,14 +571,6 @@ class MainWindow(QWidget):
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
-        # Inicia thread de download
-        self.download_thread = DownloadThread(
-            url, destination,
-            self.format_var.currentText(),
-            self.audio_quality_var.currentText(),
-            self.video_quality_var.currentText()
-        )
-        
         self.download_thread.progress.connect(self.update_progress)
         self.download_thread.status.connect(self.update_status)
         self.download_thread.finished.connect(self.download_finished)
@@ -347,6 +578,19 @@ class MainWindow(QWidget):
         
         self.download_thread.start()
     
+    def closeEvent(self, event) -> None:
+        """Grava configurações pendentes ao fechar a janela"""
+        self.config_manager.flush()
+        self.thumbnail_loader.shutdown()
+        self.queue_timer.stop()
+        if self._queue_loader is not None:
+            self._queue_loader.join()
+        if self.job_queue is not None:
+            self.job_queue.close()
+        if self.extraction_pool is not None:
+            self.extraction_pool.shutdown(wait=False)
+        super().closeEvent(event)
+    
     def cancel_download(self) -> None:
         """Cancela o download atual"""
         if self.download_thread and self.download_thread.isRunning():
@@ -372,6 +616,20 @@ Visualizações: {info.get('view_count', 0):,}
         
         self.video_info_text.setText(info_text)
         self.video_info_text.setVisible(True)
+        
+        # Miniatura carregada em segundo plano (chega por on_thumbnail_ready)
+        self.info_video_id = info.get('id')
+        pixmap = self.thumbnail_loader.request(self.info_video_id, info.get('thumbnail'))
+        self.video_thumbnail.clear()
+        self.video_thumbnail.setVisible(pixmap is not None)
+        if pixmap is not None:
+            self.video_thumbnail.setPixmap(pixmap)
+    
+    def on_thumbnail_ready(self, video_id: str, pixmap: QPixmap) -> None:
+        """Mostra a miniatura do vídeo atual quando ela termina de carregar"""
+        if video_id == self.info_video_id:
+            self.video_thumbnail.setPixmap(pixmap)
+            self.video_thumbnail.setVisible(True)
     
     def format_duration(self, seconds: int) -> str:
         """Formata duração em segundos para formato legível"""
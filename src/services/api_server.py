@@ -0,0 +1,332 @@
+import hmac
+import json
+import asyncio
+from http import HTTPStatus
+from typing import Optional, Dict, Any, Callable, Tuple, Set
+from urllib.parse import urlsplit, parse_qs
+
+from core.downloader import DownloadError
+from core.jobs import BaseJobQueue, DownloadJob, MIN_PRIORITY, MAX_PRIORITY
+
+# Converte o corpo JSON de POST /jobs num job (pode lançar ValueError/DownloadError)
+JobBuilder = Callable[[Dict[str, Any]], DownloadJob]
+
+
+class ApiError(Exception):
+    """Erro de requisição com o status HTTP correspondente"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ApiServer:
+    """Servidor HTTP/JSON local para controlar a fila de downloads
+
+    Roda num único event loop do asyncio; os downloads continuam nas
+    threads do QueueRunner e cada chamada à fila roda numa thread
+    auxiliar. Os eventos da fila chegam de outras threads e são
+    repassados ao loop com `call_soon_threadsafe`.
+
+    Rotas:
+        GET    /health            -> estado do servidor
+        GET    /jobs[?status=&limit=&offset=&order=newest] -> lista os jobs (paginado)
+        POST   /jobs              -> enfileira um job
+        GET    /jobs/<id>         -> detalhes do job
+        PATCH  /jobs/<id>         -> altera a prioridade ({"priority": n})
+        DELETE /jobs/<id>         -> cancela o job
+        GET    /videos/<id>       -> se o vídeo está pendente ou em andamento
+        GET    /events            -> progresso em tempo real (Server-Sent Events)
+
+    Rotas dos workers de outras máquinas (services.queue_client), só com
+    uma fila compartilhada (--store):
+        POST   /leases            -> retira o próximo job ({"worker_id", "lease_seconds"})
+        POST   /leases/renew      -> renova leases ({"worker_id", "job_ids", "renew"})
+        POST   /jobs/<id>/complete -> conclui um job ({"worker_id", "error"})
+    """
+
+    MAX_BODY_SIZE = 1024 * 1024
+    MAX_PAGE_SIZE = 1000
+    MAX_LEASE_SECONDS = 3600
+    EVENT_BUFFER = 256  # Eventos guardados por cliente lento antes de descartar
+
+    def __init__(self, queue: BaseJobQueue, job_builder: JobBuilder,
+                 host: str = '127.0.0.1', port: int = 8765,
+                 token: Optional[str] = None):
+        self.queue = queue
+        self.job_builder = job_builder
+        self.host = host
+        self.port = port
+        self.token = token
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    async def start(self) -> None:
+        """Abre o socket e passa a receber eventos da fila"""
+        self._loop = asyncio.get_running_loop()
+        self.queue.add_listener(self._on_queue_event)
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self.queue.remove_listener(self._on_queue_event)
+
+    # --- Eventos -------------------------------------------------------
+
+    def _on_queue_event(self, event: str, data: Dict[str, Any]) -> None:
+        """Chamado nas threads de download; repassa o evento ao event loop"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._broadcast, event, data)
+
+    def _broadcast(self, event: str, data: Dict[str, Any]) -> None:
+        message = (event, data)
+        for subscriber in self._subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente lento: descarta em vez de segurar a memória ou os downloads
+                pass
+
+    # --- HTTP ----------------------------------------------------------
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, query, headers, body = await self._read_request(reader)
+            self._check_auth(headers)
+
+            if method == 'GET' and path == '/events':
+                await self._stream_events(writer)
+                return
+
+            # As operações da fila podem bloquear (SQLite ocupado por outros
+            # processos); rodam fora do event loop para não travar os clientes
+            status, payload = await asyncio.to_thread(self._route, method, path, query, body)
+            await self._send_json(writer, status, payload)
+        except ApiError as e:
+            await self._send_json(writer, e.status, {'error': e.message})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR,
+                                  {'error': f"Erro inesperado: {str(e)}"})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Tuple[str, str, Dict[str, list], Dict[str, str], Any]:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        try:
+            method, target, _ = request_line.split(' ', 2)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Requisição inválida")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length inválido")
+        if length > self.MAX_BODY_SIZE:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo muito grande")
+
+        body = None
+        if length:
+            raw = await reader.readexactly(length)
+            try:
+                body = json.loads(raw.decode('utf-8'))
+            except ValueError:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "JSON inválido")
+
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip('/') or '/', parse_qs(url.query), headers, body
+
+    def _check_auth(self, headers: Dict[str, str]) -> None:
+        if not self.token:
+            return
+        # Comparação em tempo constante: não revela o token pelo tempo de resposta
+        expected = f"Bearer {self.token}".encode('utf-8')
+        received = headers.get('authorization', '').encode('utf-8')
+        if not hmac.compare_digest(received, expected):
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Token inválido")
+
+    def _route(self, method: str, path: str, query: Dict[str, list],
+               body: Any) -> Tuple[HTTPStatus, Any]:
+        parts = [part for part in path.split('/') if part]
+
+        if parts == ['health']:
+            return HTTPStatus.OK, {'status': 'ok', 'pending': self.queue.pending_count()}
+
+        if parts == ['jobs']:
+            if method == 'GET':
+                status = (query.get('status') or [None])[0]
+                limit = self._int_param(query, 'limit', 100, maximum=self.MAX_PAGE_SIZE)
+                offset = self._int_param(query, 'offset', 0)
+                newest_first = (query.get('order') or [''])[0] == 'newest'
+                jobs = self.queue.list_jobs(status, limit, offset, newest_first)
+                return HTTPStatus.OK, [job.to_dict() for job in jobs]
+            if method == 'POST':
+                return self._create_job(body)
+
+        if len(parts) == 2 and parts[0] == 'videos' and method == 'GET':
+            return HTTPStatus.OK, {'video_id': parts[1], 'active': self.queue.has_video(parts[1])}
+
+        if parts[:1] == ['leases'] and method == 'POST':
+            try:
+                if parts == ['leases']:
+                    return self._lease_job(body)
+                if parts == ['leases', 'renew']:
+                    return self._renew_leases(body)
+            except NotImplementedError as e:
+                raise ApiError(HTTPStatus.NOT_IMPLEMENTED, str(e))
+
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'complete' \
+                and method == 'POST':
+            try:
+                return self._complete_leased(parts[1], body)
+            except NotImplementedError as e:
+                raise ApiError(HTTPStatus.NOT_IMPLEMENTED, str(e))
+
+        if len(parts) == 2 and parts[0] == 'jobs':
+            job = self.queue.get_job(parts[1])
+            if job is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, "Job não encontrado")
+            if method == 'GET':
+                return HTTPStatus.OK, job.to_dict()
+            if method == 'DELETE':
+                if not self.queue.cancel(job.job_id):
+                    raise ApiError(HTTPStatus.CONFLICT, "O job já foi finalizado")
+                return HTTPStatus.OK, self._current(job)
+            if method == 'PATCH':
+                return self._update_job(job, body)
+
+        raise ApiError(HTTPStatus.NOT_FOUND, "Rota não encontrada")
+
+    def _create_job(self, body: Any) -> Tuple[HTTPStatus, Any]:
+        if not isinstance(body, dict) or not body.get('url'):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Informe a 'url' do vídeo")
+        try:
+            job = self.job_builder(body)
+        except (ValueError, TypeError, KeyError, DownloadError) as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+
+        if not self.queue.put(job):
+            raise ApiError(HTTPStatus.CONFLICT, "Este vídeo já está na fila")
+        return HTTPStatus.CREATED, job.to_dict()
+
+    def _int_param(self, query: Dict[str, list], name: str, default: int,
+                   maximum: Optional[int] = None) -> int:
+        try:
+            value = int((query.get(name) or [default])[0])
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' deve ser um número inteiro")
+        if value < 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' não pode ser negativo")
+        if maximum is not None and value > maximum:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' deve ser no máximo {maximum}")
+        return value
+
+    def _update_job(self, job: DownloadJob, body: Any) -> Tuple[HTTPStatus, Any]:
+        priority = body.get('priority') if isinstance(body, dict) else None
+        if isinstance(priority, bool) or not isinstance(priority, int) \
+                or not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Informe a 'priority' (inteiro de 64 bits)")
+        if not self.queue.set_priority(job.job_id, priority):
+            raise ApiError(HTTPStatus.CONFLICT, "Só jobs pendentes podem mudar de prioridade")
+        return HTTPStatus.OK, self._current(job)
+
+    def _current(self, job: DownloadJob) -> Dict[str, Any]:
+        """Relê o job depois de alterá-lo (a fila em SQLite devolve cópias)"""
+        return (self.queue.get_job(job.job_id) or job).to_dict()
+
+    def _lease_job(self, body: Any) -> Tuple[HTTPStatus, Any]:
+        worker_id = self._worker_id(body)
+        job = self.queue.lease_next(worker_id, self._lease_seconds(body))
+        return HTTPStatus.OK, {'job': job.to_dict() if job else None}
+
+    def _renew_leases(self, body: Any) -> Tuple[HTTPStatus, Any]:
+        worker_id = self._worker_id(body)
+        job_ids = self._id_list(body, 'job_ids')
+        renew = self._id_list(body, 'renew') if 'renew' in body else None
+        kept = self.queue.renew_leases(worker_id, job_ids, self._lease_seconds(body), renew)
+        return HTTPStatus.OK, {'kept': kept}
+
+    def _complete_leased(self, job_id: str, body: Any) -> Tuple[HTTPStatus, Any]:
+        worker_id = self._worker_id(body)
+        error = body.get('error') or ''
+        if not isinstance(error, str):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "'error' deve ser um texto")
+        completed = self.queue.complete_leased(worker_id, job_id, error)
+        job = self.queue.get_job(job_id)
+        return HTTPStatus.OK, {'completed': completed, 'job': job.to_dict() if job else None}
+
+    def _worker_id(self, body: Any) -> str:
+        if not isinstance(body, dict) or not isinstance(body.get('worker_id'), str) \
+                or not body['worker_id'].strip():
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Informe o 'worker_id'")
+        return body['worker_id']
+
+    def _lease_seconds(self, body: Dict[str, Any]) -> float:
+        value = body.get('lease_seconds', 60)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                or not 1 <= value <= self.MAX_LEASE_SECONDS:
+            raise ApiError(HTTPStatus.BAD_REQUEST,
+                           f"'lease_seconds' deve estar entre 1 e {self.MAX_LEASE_SECONDS}")
+        return float(value)
+
+    def _id_list(self, body: Dict[str, Any], name: str) -> list:
+        value = body.get(name)
+        if not isinstance(value, list) or len(value) > self.MAX_PAGE_SIZE \
+                or not all(isinstance(item, str) for item in value):
+            raise ApiError(HTTPStatus.BAD_REQUEST,
+                           f"'{name}' deve ser uma lista de IDs (no máximo {self.MAX_PAGE_SIZE})")
+        return value
+
+    async def _send_json(self, writer: asyncio.StreamWriter,
+                         status: HTTPStatus, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _stream_events(self, writer: asyncio.StreamWriter) -> None:
+        """Envia os eventos da fila como Server-Sent Events até o cliente sair"""
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n")
+        await writer.drain()
+
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=self.EVENT_BUFFER)
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.get(), timeout=15)
+                    chunk = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                except asyncio.TimeoutError:
+                    # Comentário periódico mantém a conexão viva e detecta clientes que saíram
+                    chunk = ": ping\n\n"
+                writer.write(chunk.encode('utf-8'))
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import socket
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode, quote
+from typing import Optional, Dict, Any, List, Set
+
+from core.jobs import BaseJobQueue, DownloadJob, PENDING
+
+_MISSING = object()
+
+
+class RemoteQueueError(Exception):
+    """Falha ao falar com a API da fila (rede ou resposta inesperada)"""
+
+
+class RemoteJobQueue(BaseJobQueue):
+    """Fila de outra máquina, acessada pela API HTTP de `serve`
+
+    Permite que workers de várias máquinas dividam a mesma fila
+    compartilhada (SQLite na máquina da API). Cada job retirado recebe um
+    lease em nome do `worker_id`; uma thread de heartbeat o renova pela
+    rota /leases/renew. Se a máquina cai ou perde a rede, o lease expira
+    e o job volta para a fila no servidor. Um job cancelado no servidor
+    ou assumido por outro worker é avisado localmente com o evento
+    'lease_lost', como na SQLiteJobQueue.
+
+    Os eventos 'progress' e 'status' ficam nesta máquina (os clientes de
+    /events do servidor veem só o início e a conclusão dos jobs).
+    """
+
+    POLL_INTERVAL = 1.0  # Intervalo entre pedidos de job quando a fila está vazia
+
+    def __init__(self, server_url: str, token: Optional[str] = None,
+                 worker_id: Optional[str] = None, lease_seconds: float = 60.0,
+                 timeout: float = 30.0):
+        super().__init__()
+        self.server_url = server_url.rstrip('/')
+        self.token = token
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._owned: Set[str] = set()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+
+    def put(self, job: DownloadJob) -> bool:
+        """Enfileira no servidor; a pasta de destino é relativa à do servidor"""
+        body = {
+            'url': job.url,
+            'destination_folder': job.destination_folder,
+            'download_format': job.download_format,
+            'audio_quality': job.audio_quality,
+            'video_quality': job.video_quality,
+            'priority': job.priority,
+            'sections': job.sections,
+        }
+        data = self._request('POST', '/jobs', body, conflict=None)
+        if data is None:
+            return False
+        job.job_id = data['job_id']
+        job.status = PENDING
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DownloadJob]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            data = self._request('POST', '/leases', {
+                'worker_id': self.worker_id,
+                'lease_seconds': self.lease_seconds,
+            })
+            if data['job'] is not None:
+                job = DownloadJob.from_dict(data['job'])
+                with self._lock:
+                    self._owned.add(job.job_id)
+                self._ensure_heartbeat()
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            time.sleep(self.POLL_INTERVAL if remaining is None
+                       else min(remaining, self.POLL_INTERVAL))
+        self.publish('started', job)
+        return job
+
+    def complete(self, job_id: str, error: str = '') -> None:
+        """Conclui o job no servidor; ignorado se o lease foi perdido"""
+        with self._lock:
+            self._owned.discard(job_id)
+        data = self._request('POST', f'/jobs/{quote(job_id)}/complete', {
+            'worker_id': self.worker_id,
+            'error': error,
+        })
+        if data['completed'] and data['job'] is not None:
+            self.publish('finished', DownloadJob.from_dict(data['job']))
+
+    def cancel(self, job_id: str) -> bool:
+        data = self._request('DELETE', f'/jobs/{quote(job_id)}', conflict=None, missing=None)
+        if data is None:
+            return False
+        with self._lock:
+            self._owned.discard(job_id)
+        self.publish('cancelled', DownloadJob.from_dict(data))
+        return True
+
+    def set_priority(self, job_id: str, priority: int) -> bool:
+        data = self._request('PATCH', f'/jobs/{quote(job_id)}', {'priority': priority},
+                             conflict=None, missing=None)
+        return data is not None
+
+    def get_job(self, job_id: str) -> Optional[DownloadJob]:
+        data = self._request('GET', f'/jobs/{quote(job_id)}', missing=None)
+        return None if data is None else DownloadJob.from_dict(data)
+
+    def list_jobs(self, status: Optional[str] = None, limit: Optional[int] = 100,
+                  offset: int = 0, newest_first: bool = False) -> List[DownloadJob]:
+        """Lista os jobs do servidor (`limit=None` busca página por página)"""
+        jobs: List[DownloadJob] = []
+        page_size = 1000  # ApiServer.MAX_PAGE_SIZE
+        while limit is None or len(jobs) < limit:
+            size = page_size if limit is None else min(page_size, limit - len(jobs))
+            query: Dict[str, Any] = {'limit': size, 'offset': offset + len(jobs)}
+            if status is not None:
+                query['status'] = status
+            if newest_first:
+                query['order'] = 'newest'
+            page = self._request('GET', f'/jobs?{urlencode(query)}')
+            jobs.extend(DownloadJob.from_dict(item) for item in page)
+            if len(page) < size:
+                break
+        return jobs
+
+    def has_video(self, video_id: str) -> bool:
+        return self._request('GET', f'/videos/{quote(video_id)}')['active']
+
+    def pending_count(self) -> int:
+        return self._request('GET', '/health')['pending']
+
+    def heartbeat(self) -> None:
+        """Renova o lease dos jobs deste worker e detecta os que foram perdidos
+
+        Jobs recusados pelo `set_lease_guard` não são renovados: expiram e
+        voltam para a fila.
+        """
+        with self._lock:
+            owned = list(self._owned)
+        if not owned:
+            return
+        guard = self._lease_guard
+        data = self._request('POST', '/leases/renew', {
+            'worker_id': self.worker_id,
+            'lease_seconds': self.lease_seconds,
+            'job_ids': owned,
+            'renew': [job_id for job_id in owned if guard is None or guard(job_id)],
+        })
+        kept = set(data['kept'])
+        lost = [job_id for job_id in owned if job_id not in kept]
+        with self._lock:
+            self._owned.difference_update(lost)
+
+        # Cancelado no servidor ou lease assumido por outro worker
+        for job_id in lost:
+            job = self.get_job(job_id)
+            if job is not None:
+                self.publish('lease_lost', job)
+
+    def _ensure_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+                self._heartbeat_stop.clear()
+                self._heartbeat_thread = threading.Thread(
+                    target=self._heartbeat_loop, name='job-lease-heartbeat', daemon=True
+                )
+                self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._heartbeat_stop.wait(self.lease_seconds / 3):
+            try:
+                self.heartbeat()
+            except RemoteQueueError as e:
+                print(f"Erro ao renovar lease dos jobs: {e}")
+
+    def _request(self, method: str, path: str, body: Any = None,
+                 conflict: Any = _MISSING, missing: Any = _MISSING) -> Any:
+        """Chama a API e devolve o JSON da resposta
+
+        `conflict` e `missing` são devolvidos no lugar de um erro 409/404
+        quando informados.
+        """
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.server_url + path, data=data,
+                                         headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code == 409 and conflict is not _MISSING:
+                return conflict
+            if e.code == 404 and missing is not _MISSING:
+                return missing
+            try:
+                message = json.loads(e.read().decode('utf-8'))['error']
+            except (ValueError, KeyError, TypeError):
+                message = e.reason
+            raise RemoteQueueError(f"{method} {path}: {e.code} {message}")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise RemoteQueueError(f"{method} {path}: {e}")
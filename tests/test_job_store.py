@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from core.jobs import DownloadJob, PENDING, RUNNING, DONE, FAILED
+from core.job_store import SQLiteJobQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'queue.db')
+
+
+def make_job(index: int = 0) -> DownloadJob:
+    video_id = f"{index:011d}"
+    return DownloadJob(url=f"https://www.youtube.com/watch?v={video_id}",
+                       destination_folder='.', video_id=video_id)
+
+
+def open_worker(db_path: str, worker_id: str, **kwargs) -> SQLiteJobQueue:
+    queue = SQLiteJobQueue(db_path, worker_id=worker_id, **kwargs)
+    # Sem heartbeat automático: os testes controlam quando o lease expira
+    queue._ensure_heartbeat = lambda: None
+    return queue
+
+
+def expire_leases(queue: SQLiteJobQueue) -> None:
+    queue._conn.execute("UPDATE jobs SET lease_expires = ? WHERE status = ?",
+                        (time.time() - 1, RUNNING))
+
+
+def test_complete_after_lost_lease_is_ignored(db_path):
+    first = open_worker(db_path, 'w1')
+    second = open_worker(db_path, 'w2')
+    job = make_job()
+    first.put(job)
+
+    assert first.get(timeout=0).job_id == job.job_id
+    expire_leases(first)
+    assert second.get(timeout=0).job_id == job.job_id
+
+    lost = []
+    first.add_listener(lambda event, data: event == 'lease_lost' and lost.append(data['job_id']))
+    first.heartbeat()
+    assert lost == [job.job_id]
+
+    # O primeiro worker conclui com erro depois de perder o lease: ignorado
+    first.complete(job.job_id, error="Download cancelado")
+    assert first.get_job(job.job_id).status == RUNNING
+    assert first.completion(job.job_id) is None
+
+    second.complete(job.job_id)
+    second.complete(job.job_id, error="conclusão repetida")
+    assert second.get_job(job.job_id).status == DONE
+    assert second.completion(job.job_id)['worker_id'] == 'w2'
+    first.close()
+    second.close()
+
+
+def test_requeue_expired_returns_job_to_queue(db_path):
+    queue = open_worker(db_path, 'w1')
+    job = make_job()
+    queue.put(job)
+    queue.get(timeout=0)
+
+    assert queue.requeue_expired() == 0
+    expire_leases(queue)
+    assert queue.requeue_expired() == 1
+
+    requeued = queue.get_job(job.job_id)
+    assert requeued.status == PENDING
+    assert queue.pending_count() == 1
+    assert queue.get(timeout=0).job_id == job.job_id
+    queue.close()
+
+
+def test_job_fails_after_max_attempts(db_path):
+    queue = open_worker(db_path, 'w1', max_attempts=2)
+    job = make_job()
+    queue.put(job)
+
+    for _ in range(2):
+        assert queue.get(timeout=0).job_id == job.job_id
+        expire_leases(queue)
+
+    # Esgotou as tentativas: não volta para a fila
+    assert queue.get(timeout=0) is None
+    failed = queue.get_job(job.job_id)
+    assert failed.status == FAILED
+    assert failed.error
+    queue.close()
+
+
+def test_heartbeat_renews_only_guarded_jobs(db_path):
+    queue = open_worker(db_path, 'w1')
+    active, abandoned = make_job(1), make_job(2)
+    queue.put_many([active, abandoned])
+    queue.get(timeout=0)
+    queue.get(timeout=0)
+    queue.set_lease_guard(lambda job_id: job_id == active.job_id)
+
+    expire_leases(queue)
+    queue.heartbeat()
+    assert queue.requeue_expired() == 1
+    assert queue.get_job(active.job_id).status == RUNNING
+    assert queue.get_job(abandoned.job_id).status == PENDING
+    queue.close()
@@ -0,0 +1,105 @@
+import time
+import socket
+import asyncio
+import threading
+
+import pytest
+
+from core.jobs import DownloadJob, RUNNING, DONE, JobQueue
+from core.job_store import SQLiteJobQueue
+from services.api_server import ApiServer
+from services.queue_client import RemoteJobQueue, RemoteQueueError
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def serve():
+    """Sobe o ApiServer numa thread e devolve a URL"""
+    loops = []
+
+    def start(queue, token=None) -> str:
+        port = free_port()
+        server = ApiServer(queue, DownloadJob.from_dict, '127.0.0.1', port, token)
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(server.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait(5)
+        loops.append(loop)
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for loop in loops:
+        # Encerra as conexões pendentes antes de parar o loop
+        asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+async def cancel_tasks() -> None:
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def make_job(index: int = 0) -> DownloadJob:
+    video_id = f"{index:011d}"
+    return DownloadJob(url=f"https://www.youtube.com/watch?v={video_id}",
+                       destination_folder='.', video_id=video_id)
+
+
+def test_remote_worker_leases_and_completes(tmp_path, serve):
+    store = SQLiteJobQueue(str(tmp_path / 'queue.db'))
+    job = make_job()
+    store.put(job)
+    url = serve(store, token='segredo')
+
+    worker = RemoteJobQueue(url, 'segredo', worker_id='remoto', lease_seconds=30)
+    leased = worker.get(timeout=0)
+    assert leased.job_id == job.job_id
+    assert store.get_job(job.job_id).status == RUNNING
+    assert worker.has_video(job.video_id)
+
+    worker.complete(job.job_id)
+    assert store.get_job(job.job_id).status == DONE
+    assert store.completion(job.job_id)['worker_id'] == 'remoto'
+    assert worker.get(timeout=0) is None
+    worker.close()
+    store.close()
+
+
+def test_remote_worker_detects_lost_lease(tmp_path, serve):
+    store = SQLiteJobQueue(str(tmp_path / 'queue.db'))
+    job = make_job()
+    store.put(job)
+    worker = RemoteJobQueue(serve(store), worker_id='remoto', lease_seconds=30)
+    worker._ensure_heartbeat = lambda: None
+    lost = []
+    worker.add_listener(lambda event, data: event == 'lease_lost' and lost.append(data['job_id']))
+
+    worker.get(timeout=0)
+    store.cancel(job.job_id)
+    worker.heartbeat()
+    assert lost == [job.job_id]
+
+    # A conclusão depois do cancelamento é ignorada no servidor
+    worker.complete(job.job_id)
+    assert store.completion(job.job_id) is None
+    store.close()
+
+
+def test_leases_require_shared_queue(serve):
+    worker = RemoteJobQueue(serve(JobQueue()), worker_id='remoto')
+    with pytest.raises(RemoteQueueError, match='501'):
+        worker.get(timeout=0)